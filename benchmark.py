@@ -0,0 +1,295 @@
+import argparse
+import functools
+import inspect
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+import matplotlib
+import numpy as np
+import reportlab
+import sympy
+from reportlab.pdfgen.canvas import Canvas
+import figure_cache
+import raster_export
+import reportlab_backend
+import symbolic_cache
+import sympy_kernels
+import utils
+from cache_files import PROJECT_DIR
+from main import PAGES, generate_full_report, load_page, page_workdir, select_pages
+from report_generator import ReportGenerator
+
+# Этапы построения отчета в порядке конвейера; время, не попавшее
+# ни в один этап (текст страницы, проверки кэша), учитывается как other
+STAGES = ('symbolic', 'numeric', 'figure_draw', 'encode', 'draw_image', 'save', 'merge', 'other')
+
+# Код обертки symbolic_cache общий для всех декорированных функций
+_SYMBOLIC_WRAPPER_CODE = symbolic_cache.symbolic_cache(lambda: None).__code__
+
+class StageTimer:
+    """
+    Накапливает время по этапам. Этапы могут быть вложенными: время
+    вложенного этапа не входит во время внешнего (учитывается собственное время)
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            parent, started = self._stack[-1]
+            self.totals[parent] += now - started
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            name, started = self._stack.pop()
+            self.totals[name] += end - started
+            if self._stack:
+                self._stack[-1][1] = end
+
+    def wrap(self, func, name):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return timed
+
+class Instrumentation:
+    """Временно подменяет функции конвейера обертками StageTimer"""
+
+    def __init__(self, timer):
+        self.timer = timer
+        self._patched = []
+
+    def patch(self, owner, name, stage):
+        original = getattr(owner, name)
+        self._patched.append((owner, name, original))
+        setattr(owner, name, self.timer.wrap(original, stage))
+
+    def patch_everywhere(self, original, stage):
+        """Подменяет функцию во всех модулях проекта, которые импортировали ее по имени"""
+        for module in _project_modules():
+            for name, value in list(vars(module).items()):
+                if value is original:
+                    self.patch(module, name, stage)
+
+    def install(self):
+        self.patch(Canvas, 'save', 'save')
+        self.patch(Canvas, 'drawImage', 'draw_image')
+        self.patch(ReportGenerator, 'merge_reports', 'merge')
+        self.patch_everywhere(raster_export.render_figure_pixels, 'figure_draw')
+        self.patch_everywhere(reportlab_backend.draw_figure, 'figure_draw')
+        self.patch_everywhere(raster_export.encode_pixels, 'encode')
+        self.patch_everywhere(raster_export.draw_encoded_image, 'draw_image')
+        self.patch_everywhere(sympy_kernels.compile_expression, 'symbolic')
+
+        # Функции проектов: символьные (с кэшем symbolic_cache) и численные
+        for module in _project_modules():
+            if not module.__name__.startswith('project_'):
+                continue
+            for name, value in list(vars(module).items()):
+                if not inspect.isfunction(value) or value.__module__ != module.__name__:
+                    continue
+                if name.startswith('create_report'):
+                    continue
+                stage = 'symbolic' if value.__code__ is _SYMBOLIC_WRAPPER_CODE else 'numeric'
+                self.patch(module, name, stage)
+
+    def restore(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched.clear()
+
+def _project_modules():
+    """Загруженные модули из каталога проекта"""
+    modules = []
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if path and os.path.dirname(os.path.abspath(path)) == PROJECT_DIR:
+            modules.append(module)
+    return modules
+
+def clear_caches():
+    """Очищает дисковые кэши и кэши процесса, чтобы замер шел с холодного старта"""
+    for cache_dir in (figure_cache.CACHE_DIR, symbolic_cache.CACHE_DIR, utils.FORMULA_CACHE_DIR):
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    symbolic_cache._memory_cache.clear()
+    sympy_kernels._kernels.clear()
+
+def render_single_page(page_number, module_name, function_name, args):
+    """Строит одну страницу в памяти так же, как main.render_page"""
+    create_report = load_page(module_name, function_name)
+    report_gen = ReportGenerator(in_memory=True)
+    canvas, _ = report_gen.create_new_canvas(page_number)
+    try:
+        with page_workdir(report_gen, page_number):
+            create_report(*args, canvas)
+            canvas.save()
+    finally:
+        report_gen.cleanup()
+
+def measure(run, warmup=1, repeat=5, cold=False):
+    """
+    Выполняет run() warmup раз без замера и repeat раз с замером
+    Возвращает списки времени (в секундах) по этапам и общее время
+    """
+    for _ in range(warmup):
+        if cold:
+            clear_caches()
+        run()
+
+    samples = defaultdict(list)
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        timer = StageTimer()
+        instrumentation = Instrumentation(timer)
+        instrumentation.install()
+        try:
+            with timer.stage('other'):
+                start = time.perf_counter()
+                run()
+                total = time.perf_counter() - start
+        finally:
+            instrumentation.restore()
+
+        samples['total'].append(total)
+        for stage in STAGES:
+            samples[stage].append(timer.totals.get(stage, 0.0))
+    return samples
+
+def summarize(values):
+    """Статистика замеров в секундах"""
+    return {
+        'median': statistics.median(values),
+        'min': min(values),
+        'mean': statistics.fmean(values),
+        'stdev': statistics.stdev(values) if len(values) > 1 else 0.0,
+        'samples': values,
+    }
+
+def run_benchmarks(page_numbers=None, warmup=1, repeat=5, cold=False, jobs=1, full_report=True):
+    """
+    Замеряет построение каждой выбранной страницы и полного отчета
+    Возвращает результаты в виде словаря, готового к записи в JSON
+    """
+    benchmarks = {}
+    selected = select_pages(page_numbers)
+    # Модули импортируются заранее, чтобы их функции попали под замер по этапам
+    for _, page in selected:
+        load_page(*page[:2])
+
+    for page_number, page in selected:
+        samples = measure(lambda: render_single_page(page_number, *page), warmup, repeat, cold)
+        benchmarks[f'page_{page_number}'] = {name: summarize(values) for name, values in samples.items()}
+
+    if full_report:
+        def run():
+            generate_full_report(jobs=jobs, in_memory=True, output=io.BytesIO(),
+                                 page_numbers=[n for n, _ in selected])
+        samples = measure(run, warmup, repeat, cold)
+        benchmarks['full_report'] = {name: summarize(values) for name, values in samples.items()}
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'sympy': sympy.__version__,
+            'reportlab': reportlab.Version,
+            'warmup': warmup,
+            'repeat': repeat,
+            'cache': 'cold' if cold else 'warm',
+            # При jobs > 1 страницы строятся в других процессах, и по этапам
+            # в полном отчете видно только объединение
+            'jobs': jobs,
+        },
+        'benchmarks': benchmarks,
+    }
+
+def compare(results, baseline, threshold=0.1, min_delta=0.005):
+    """
+    Сравнивает медианы с базовыми результатами
+    Регрессия - рост медианы больше чем на threshold (доля) и на min_delta секунд
+    Возвращает строки отчета и список регрессий (тест, этап, было, стало)
+    """
+    lines = []
+    regressions = []
+    for name, stages in results['benchmarks'].items():
+        base_stages = baseline['benchmarks'].get(name)
+        if base_stages is None:
+            lines.append(f'{name}: нет в базовых результатах')
+            continue
+        for stage, stats in stages.items():
+            if stage not in base_stages:
+                continue
+            old = base_stages[stage]['median']
+            new = stats['median']
+            change = (new - old) / old if old > 0 else 0.0
+            regressed = new - old > min_delta and new > old * (1 + threshold)
+            mark = '  РЕГРЕССИЯ' if regressed else ''
+            lines.append(f'{name:<12} {stage:<12} {old * 1000:9.1f} -> {new * 1000:9.1f} мс {change:+7.1%}{mark}')
+            if regressed:
+                regressions.append((name, stage, old, new))
+    return lines, regressions
+
+def format_results(results):
+    """Краткая таблица медиан по этапам в миллисекундах"""
+    lines = [f"{'':<12}" + ''.join(f'{stage:>12}' for stage in ('total',) + STAGES)]
+    for name, stages in results['benchmarks'].items():
+        lines.append(f'{name:<12}' + ''.join(f"{stages[stage]['median'] * 1000:12.1f}"
+                                            for stage in ('total',) + STAGES))
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Замер времени построения отчета по этапам')
+    parser.add_argument('--pages', type=int, nargs='+', metavar='N',
+                        help=f'номера проектов (по умолчанию все {len(PAGES)})')
+    parser.add_argument('--warmup', type=int, default=1, help='прогонов без замера')
+    parser.add_argument('--repeat', type=int, default=5, help='прогонов с замером')
+    parser.add_argument('--cold', action='store_true',
+                        help='очищать кэши перед каждым прогоном')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='число процессов при построении полного отчета')
+    parser.add_argument('--no-full-report', action='store_true',
+                        help='не замерять generate_full_report')
+    parser.add_argument('--output', help='файл для результатов JSON (по умолчанию стандартный вывод)')
+    parser.add_argument('--baseline', help='файл JSON с базовыми результатами для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='допустимый рост медианы, доля (по умолчанию 0.1)')
+    parser.add_argument('--min-delta', type=float, default=0.005,
+                        help='рост меньше этого числа секунд не считается регрессией')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.pages, args.warmup, args.repeat, args.cold,
+                             args.jobs, not args.no_full_report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+        print(format_results(results), file=sys.stderr)
+    else:
+        json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        lines, regressions = compare(results, baseline, args.threshold, args.min_delta)
+        print('\n'.join(lines), file=sys.stderr)
+        if regressions:
+            print(f'Регрессий: {len(regressions)}', file=sys.stderr)
+            sys.exit(1)
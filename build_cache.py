@@ -0,0 +1,99 @@
+import ast
+import glob
+import hashlib
+import os
+import platform
+from importlib import metadata
+from cache_files import PROJECT_DIR, atomic_write
+
+CACHE_DIR = os.path.join(PROJECT_DIR, '.build_cache')
+FONTS_DIR = os.path.join(PROJECT_DIR, 'fonts')
+
+# Библиотеки, от версии которых зависит вид страницы
+LIBRARIES = ('numpy', 'sympy', 'matplotlib', 'reportlab', 'pillow', 'PyPDF2')
+
+def _local_imports(module_name):
+    """
+    Модули проекта, которые импортирует module_name (включая импорты
+    внутри функций). Исходный код разбирается без выполнения модуля
+    """
+    path = os.path.join(PROJECT_DIR, module_name + '.py')
+    with open(path, encoding='utf-8') as file:
+        tree = ast.parse(file.read(), path)
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.add(node.module.split('.')[0])
+    return {name for name in names if os.path.exists(os.path.join(PROJECT_DIR, name + '.py'))}
+
+def module_closure(module_name):
+    """Модуль и все модули проекта, от которых он зависит через импорты"""
+    closure = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        if name not in closure:
+            closure.add(name)
+            pending.extend(_local_imports(name) - closure)
+    return sorted(closure)
+
+def _file_digest(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def _library_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return 'missing'
+
+def page_key(module_name, function_name, args=()):
+    """
+    Отпечаток входных данных страницы: исходный код модуля проекта и всех
+    модулей, которые он импортирует, функция и параметры построения,
+    файлы шрифтов и версии Python и библиотек
+    Модули при этом не импортируются, поэтому проверка неизменных страниц дешевая
+    """
+    h = hashlib.sha256()
+    parts = [f'{module_name}.{function_name}', repr(tuple(args))]
+    for name in module_closure(module_name):
+        parts.append(f'{name}={_file_digest(os.path.join(PROJECT_DIR, name + ".py"))}')
+    for path in sorted(glob.glob(os.path.join(FONTS_DIR, '*'))):
+        parts.append(f'{os.path.basename(path)}={_file_digest(path)}')
+    parts.append(f'python={platform.python_version()}')
+    parts.extend(f'{name}={_library_version(name)}' for name in LIBRARIES)
+
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+def _page_path(module_name, key, cache_dir):
+    return os.path.join(cache_dir, f'{module_name}.{key}.pdf')
+
+def load_built_page(module_name, key, cache_dir=CACHE_DIR):
+    """Байты PDF собранной ранее страницы или None, если страница не собиралась"""
+    try:
+        with open(_page_path(module_name, key, cache_dir), 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+def store_built_page(module_name, key, data, cache_dir=CACHE_DIR):
+    """
+    Атомарно сохраняет байты PDF страницы в кэш сборки
+    Прежние версии страницы этого модуля удаляются, кэш не растет
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    filepath = _page_path(module_name, key, cache_dir)
+    atomic_write(filepath, lambda file: file.write(data))
+
+    for path in glob.glob(os.path.join(cache_dir, f'{module_name}.*.pdf')):
+        if path != filepath:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,128 @@
+import glob
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from PIL import Image
+from cache_files import PROJECT_DIR
+from figure_cache import figure_key
+from utils import render_formulas
+
+# Помощники шаблона лежат в своих модулях; их тела меняются от варианта к варианту
+HELPER_SOURCE = '''
+def profile(u):
+    return {profile}
+'''
+
+SHADING_SOURCE = '''
+def shade(value):
+    return {shade}
+'''
+
+# Шаблон устроен как шаблоны страниц: функция построения обращается к классу,
+# метод базового класса вызывает помощника из другого модуля, а метод
+# наследника импортирует второго помощника в своем теле, как растеризатор
+TEMPLATE_SOURCE = '''
+from key_check_helper import profile
+
+class BaseTemplate:
+    def surface(self, u):
+        return profile(u)
+
+class Template(BaseTemplate):
+    def update(self, u):
+        from key_check_shading import shade
+        return shade(self.surface(u))
+
+def plot(u):
+    return Template().update(u)
+'''
+
+# Формула, которую mathtext не разбирает, и формулы для пакетного набора LaTeX:
+# знак % не должен закомментировать конец своей страницы документа
+MATHTEXT_UNSUPPORTED = r'\begin{pmatrix} a & b \end{pmatrix}'
+LATEX_BATCH = [r'p = 50%', r'\frac{a}{b}', r'p = 50']
+
+# Проверки: описание, тела помощников (profile, shade) в двух вариантах
+# и должны ли ключи совпасть
+CHECKS = [
+    ('тот же код - тот же ключ', ('u * 2', 'value'), ('u * 2', 'value'), True),
+    ('изменен помощник метода базового класса', ('u * 2', 'value'), ('u * 3', 'value'), False),
+    ('изменен помощник, импортируемый в методе', ('u * 2', 'value'), ('u * 2', '-value'), False),
+]
+
+def _template_key(work_dir, variant, bodies):
+    """Ключ кэша функции построения из модулей шаблона, собранных в каталоге варианта"""
+    path = os.path.join(work_dir, variant)
+    os.makedirs(path)
+    with open(os.path.join(path, 'key_check_helper.py'), 'w', encoding='utf-8') as file:
+        file.write(HELPER_SOURCE.format(profile=bodies[0]))
+    with open(os.path.join(path, 'key_check_shading.py'), 'w', encoding='utf-8') as file:
+        file.write(SHADING_SOURCE.format(shade=bodies[1]))
+    with open(os.path.join(path, 'key_check_template.py'), 'w', encoding='utf-8') as file:
+        file.write(TEMPLATE_SOURCE)
+
+    sys.path.insert(0, path)
+    importlib.invalidate_caches()
+    try:
+        return figure_key(importlib.import_module('key_check_template').plot, (1.0,))
+    finally:
+        sys.path.remove(path)
+        for name in ('key_check_template', 'key_check_helper', 'key_check_shading'):
+            sys.modules.pop(name, None)
+
+def verify_cache_keys():
+    """
+    Проверяет, что ключ кэша графика меняется вместе с кодом, от которого
+    зависит график, и только с ним. Модули шаблона создаются во временном
+    каталоге внутри проекта, чтобы их функции считались функциями проекта
+    Возвращает список пар (описание, выполнено)
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix='.key_check_', dir=PROJECT_DIR) as work_dir:
+        for number, (description, before, after, same) in enumerate(CHECKS):
+            key_before = _template_key(work_dir, f'{number}a', before)
+            key_after = _template_key(work_dir, f'{number}b', after)
+            results.append((description, (key_before == key_after) == same))
+    return results
+
+def verify_formula_cache():
+    """
+    Проверяет кэш формул: отказ mathtext запоминается, а пакетный набор
+    LaTeX дает по изображению на формулу с учетом знака %. Без latex
+    и dvipng пакетная проверка пропускается (выполнено = None)
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            render_formulas([MATHTEXT_UNSUPPORTED], usetex=False, cache_dir=cache_dir)
+            remembered = False
+        except ValueError:
+            remembered = len(glob.glob(os.path.join(cache_dir, '*.unsupported'))) == 1
+        results.append(('отказ mathtext запоминается в кэше', remembered))
+
+        if shutil.which('latex') is None or shutil.which('dvipng') is None:
+            results.append(('формулы LaTeX набираются одним запуском TeX', None))
+            return results
+        paths = render_formulas(LATEX_BATCH, usetex=True, cache_dir=cache_dir)
+        widths = []
+        for path in paths:
+            with Image.open(path) as image:
+                widths.append(image.size[0])
+        # Формула с % шире той же формулы без него, если знак не стал комментарием
+        results.append(('формулы LaTeX набираются одним запуском TeX',
+                        len(set(paths)) == len(LATEX_BATCH) and widths[0] > widths[2]))
+    return results
+
+def main():
+    results = verify_cache_keys() + verify_formula_cache()
+    for description, passed in results:
+        status = 'пропущено (нет latex/dvipng)' if passed is None else 'ok' if passed else 'FAIL'
+        print(f'{description:45} {status}')
+    failed = sum(passed is False for _, passed in results)
+    print(f'Проверок: {len(results)}; не выполнено: {failed}')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+# Директория проекта: рядом с модулями лежат каталоги кэшей и шрифтов
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def atomic_write(filepath, write):
+    """
+    Пишет файл функцией write(file) во временный файл в том же каталоге и атомарно
+    переименовывает, чтобы параллельные процессы не видели недописанные данные
+    """
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(filepath))
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            write(file)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
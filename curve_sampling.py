@@ -0,0 +1,117 @@
+import numpy as np
+from tracing import traced
+
+def _point_segment_distance(p, a, b):
+    """Расстояния от точек p до отрезков [a, b]; массивы формы (dim, N)"""
+    ab = b - a
+    ap = p - a
+    length_sq = np.einsum('i...,i...->...', ab, ab)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.clip(np.einsum('i...,i...->...', ap, ab) / length_sq, 0.0, 1.0)
+    t = np.where(length_sq > 0, t, 0.0)
+    diff = ap - t * ab
+    return np.sqrt(np.einsum('i...,i...->...', diff, diff))
+
+def tolerance_in_data_units(tolerance, points, placement):
+    """
+    Переводит допуск из пунктов страницы в единицы данных
+    points - предварительные точки кривой (dim, N), по ним оценивается
+    диапазон данных; placement - размер места под график (ширина, высота) в пунктах
+    """
+    extent = np.nanmax(points, axis=1) - np.nanmin(points, axis=1)
+    extent = np.max(extent[np.isfinite(extent)], initial=0.0)
+    if extent == 0:
+        return tolerance
+    # Берем меньшую сторону - это наихудший масштаб, с которым кривая попадет на страницу
+    return tolerance * extent / min(placement)
+
+def adaptive_sample(point_func, u_start, u_end, tolerance, initial_samples=65, max_depth=20):
+    """
+    Адаптивная выборка параметра: отрезок делится пополам, пока середина дуги
+    отстоит от хорды больше чем на tolerance (в единицах данных)
+    point_func принимает массив параметров и возвращает точки (dim, N).
+    Все отрезки одного уровня уточняются за один вызов point_func
+    """
+    u = np.linspace(u_start, u_end, initial_samples)
+    points = np.asarray(point_func(u), dtype=float)
+
+    for _ in range(max_depth):
+        mid = (u[:-1] + u[1:]) / 2
+        mid_points = np.asarray(point_func(mid), dtype=float)
+        error = _point_segment_distance(mid_points, points[:, :-1], points[:, 1:])
+
+        # Сравнение с NaN ложно, поэтому разрывы кривой не уточняются
+        refine = error > tolerance
+        if not refine.any():
+            break
+
+        index = np.nonzero(refine)[0] + 1
+        u = np.insert(u, index, mid[refine])
+        points = np.insert(points, index, mid_points[:, refine], axis=1)
+
+    return u, points
+
+def _douglas_peucker(points, tolerance):
+    """Маска вершин, оставляемых алгоритмом Дугласа-Пекера для непрерывной ломаной"""
+    n = points.shape[1]
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        inner = points[:, start + 1:end]
+        a = points[:, start:start + 1]
+        b = points[:, end:end + 1]
+        distance = _point_segment_distance(inner, a, b)
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return keep
+
+def simplify_polyline(points, tolerance):
+    """
+    Упрощает ломаную (dim, N) алгоритмом Дугласа-Пекера с допуском tolerance
+    Участки, разделенные NaN, упрощаются независимо, разрывы сохраняются
+    """
+    points = np.asarray(points, dtype=float)
+    finite = np.all(np.isfinite(points), axis=0)
+    keep = ~finite
+
+    # Границы непрерывных участков без NaN
+    edges = np.diff(np.concatenate(([0], finite.astype(np.int8), [0])))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
+    for start, end in zip(starts, ends):
+        keep[start:end] = _douglas_peucker(points[:, start:end], tolerance)
+
+    # Из серии подряд идущих NaN достаточно одной точки разрыва
+    gap = ~finite
+    keep &= ~(gap & np.concatenate(([False], gap[:-1])))
+    return points[:, keep]
+
+@traced(category='numpy')
+def sample_curve(point_func, u_start, u_end, placement=(500, 400), dpi=300,
+                 tolerance=None, initial_samples=65):
+    """
+    Строит ломаную для кривой, которая займет на странице место placement (в пунктах)
+    tolerance - допустимое отклонение в пунктах страницы, по умолчанию
+    один пиксель при разрешении dpi. Возвращает точки (dim, N)
+    """
+    if tolerance is None:
+        tolerance = 72 / dpi
+
+    coarse = np.asarray(point_func(np.linspace(u_start, u_end, initial_samples)), dtype=float)
+    data_tolerance = tolerance_in_data_units(tolerance, coarse, placement)
+
+    # Допуск делится поровну между выборкой и упрощением
+    _, points = adaptive_sample(point_func, u_start, u_end, data_tolerance / 2, initial_samples)
+    return simplify_polyline(points, data_tolerance / 2)
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import matplotlib
+from cache_files import PROJECT_DIR, atomic_write
+from fingerprint import fingerprint
+from raster_export import EXTENSIONS, draw_encoded_image, encode_pixels, render_figure_pixels
+from surface_mesh import viewport
+from tracing import span
+
+CACHE_DIR = os.path.join(PROJECT_DIR, '.figure_cache')
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+def figure_key(plot_func, args=(), kwargs=None, dpi=300, size=None, encoding='png'):
+    """
+    Ключ кэша: хеш исходного кода функции построения, ее аргументов,
+    разрешения, размера места на странице, кодирования и версии matplotlib
+    """
+    h = hashlib.sha256()
+    for part in (fingerprint(plot_func),
+                 fingerprint(tuple(args)),
+                 fingerprint(kwargs or {}),
+                 f'dpi={dpi}',
+                 f'size={size}',
+                 f'encoding={encoding}',
+                 f'matplotlib={matplotlib.__version__}'):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Удаляет давно не использованные изображения, пока кэш превышает лимит"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(('.png', '.jpg')):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    # Время изменения обновляется при каждом попадании, поэтому
+    # первыми удаляются записи, к которым дольше всего не обращались
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def lookup_cached(filepath):
+    """Проверяет наличие записи и отмечает ее как недавно использованную"""
+    if not os.path.exists(filepath):
+        return False
+    try:
+        os.utime(filepath)
+        return True
+    except FileNotFoundError:
+        # Запись удалена другим процессом между проверкой и обращением
+        return False
+
+def cached_raster(plot_func, *args, size=(500, 400), dpi=300, encoding='flate',
+                  cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, **kwargs):
+    """
+    Возвращает путь к изображению графика, отрисованному ровно под место
+    size (в пунктах) при разрешении dpi и закодированному способом encoding
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = figure_key(plot_func, args, kwargs, dpi, size=tuple(size), encoding=encoding)
+    filepath = os.path.join(cache_dir, key + EXTENSIONS[encoding])
+    if lookup_cached(filepath):
+        return filepath
+
+    # Построение фигуры: численная геометрия и артисты matplotlib
+    # Генераторы сеток подбирают плотность под размер места на странице
+    with span(getattr(plot_func, '__qualname__', 'plot'), 'numpy'), viewport(*size, dpi):
+        fig = plot_func(*args, **kwargs)
+    pixels = render_figure_pixels(fig, *size, dpi=dpi)
+    data = encode_pixels(pixels, encoding)
+    atomic_write(filepath, lambda file: file.write(data))
+
+    evict_cache(cache_dir, max_bytes)
+    return filepath
+
+def draw_cached_figure(canvas, plot_func, args, x, y, width, height, dpi=300, encoding='flate'):
+    """
+    Рисует график plot_func(*args) в прямоугольнике (x, y, width, height)
+    Изображение берется из кэша или рендерится ровно под этот прямоугольник
+    """
+    filepath = cached_raster(plot_func, *args, size=(width, height), dpi=dpi, encoding=encoding)
+    draw_encoded_image(canvas, filepath, x, y, width, height)
@@ -0,0 +1,75 @@
+from matplotlib.figure import Figure
+
+# Шаблоны текущего процесса: у каждого рабочего процесса свои
+_templates = {}
+
+class FigureTemplate:
+    """
+    Шаблон графика: фигура, оси, подписи, сетка и легенда создаются один раз
+    в setup, а update для новых параметров меняет только данные артистов
+
+    Фигура создается без pyplot, поэтому plt.close после отрисовки ее
+    не уничтожает и шаблон можно рисовать сколько угодно раз
+    """
+
+    figsize = (12, 8)
+
+    def __init__(self):
+        self.fig = Figure(figsize=self.figsize)
+        self.setup(self.fig)
+
+    def setup(self, fig):
+        raise NotImplementedError
+
+    def update(self, *args):
+        raise NotImplementedError
+
+    def render(self, *args):
+        """Подставляет данные для параметров args и возвращает готовую к отрисовке фигуру"""
+        self.update(*args)
+        return self.fig
+
+class SurfaceTemplate(FigureTemplate):
+    """
+    Поверхность с цветовой шкалой в трехмерных осях
+    Наследник задает title и surface(*args) -> (X, Y, Z)
+    """
+
+    title = ''
+
+    def setup(self, fig):
+        self.ax = fig.add_subplot(111, projection='3d')
+        self.ax.set_xlabel('X')
+        self.ax.set_ylabel('Y')
+        self.ax.set_zlabel('Z')
+        self.ax.set_title(self.title)
+        self.artist = None
+        self.colorbar = None
+
+    def surface(self, *args):
+        raise NotImplementedError
+
+    def update(self, *args):
+        X, Y, Z = self.surface(*args)
+
+        # Поверхность растеризуется целиком при отрисовке, поэтому для новых
+        # параметров меняются только ее данные и пределы осей; шкала цветов
+        # следит за поверхностью сама
+        if self.artist is None:
+            # Растеризатор тянет за собой mpl_toolkits; шаблонам плоских кривых он не нужен
+            from surface_render import plot_shaded_surface
+            self.artist = plot_shaded_surface(self.ax, X, Y, Z, cmap='viridis', alpha=0.8)
+            self.colorbar = self.fig.colorbar(self.artist)
+        else:
+            self.artist.set_data(X, Y, Z)
+            self.ax.auto_scale_xyz(X, Y, Z, had_data=False)
+
+def template_figure(template_class, *args):
+    """
+    Фигура шаблона template_class с данными для args
+    Шаблон строится при первом обращении и дальше переиспользуется в процессе
+    """
+    template = _templates.get(template_class)
+    if template is None:
+        template = _templates[template_class] = template_class()
+    return template.render(*args)
@@ -0,0 +1,179 @@
+import dis
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import os
+import sys
+import types
+import numpy as np
+from cache_files import PROJECT_DIR
+
+def _is_project_object(obj):
+    """Проверяет, что объект - функция или класс, объявленные в модулях проекта"""
+    # Функции под декораторами (lru_cache, traced) проверяются по оригиналу
+    if not isinstance(obj, type) and hasattr(obj, '__wrapped__'):
+        obj = inspect.unwrap(obj)
+    if isinstance(obj, types.FunctionType):
+        filename = obj.__code__.co_filename
+    elif isinstance(obj, type):
+        filename = getattr(sys.modules.get(obj.__module__), '__file__', None)
+        if filename is None:
+            return False
+    else:
+        return False
+    return os.path.abspath(filename).startswith(PROJECT_DIR + os.sep)
+
+def _code_fingerprint(code):
+    """Отпечаток байткода: не зависит от адресов объектов в памяти"""
+    parts = [code.co_code.hex(), repr(code.co_names), repr(code.co_varnames)]
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            parts.append(_code_fingerprint(const))
+        else:
+            parts.append(repr(const))
+    return '|'.join(parts)
+
+def _referenced_names(code):
+    """Имена глобальных объектов, используемых кодом и вложенными функциями"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _referenced_names(const)
+    return names
+
+def _project_module(name):
+    """Модуль проекта с именем name или None; чужие модули не импортируются"""
+    module = sys.modules.get(name)
+    if module is None:
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            return None
+        if spec is None or spec.origin is None:
+            return None
+        if not os.path.abspath(spec.origin).startswith(PROJECT_DIR + os.sep):
+            return None
+        module = importlib.import_module(name)
+    filename = getattr(module, '__file__', None)
+    if filename is None or not os.path.abspath(filename).startswith(PROJECT_DIR + os.sep):
+        return None
+    return module
+
+def _imported_objects(code):
+    """
+    Объекты проекта, импортируемые внутри кода и вложенных функций
+    (from surface_render import plot_shaded_surface в теле функции):
+    таких имен нет среди глобальных, но от них результат зависит так же
+    """
+    objects = []
+    module = None
+    for instruction in dis.get_instructions(code):
+        if instruction.opname == 'IMPORT_NAME':
+            module = _project_module(instruction.argval)
+            if module is not None:
+                objects.append(module)
+        elif instruction.opname == 'IMPORT_FROM' and module is not None:
+            if objects and objects[-1] is module:
+                objects.pop()
+            objects.append(getattr(module, instruction.argval, None))
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            objects.extend(_imported_objects(const))
+    return objects
+
+def _function_fingerprint(func, seen):
+    """
+    Отпечаток функции: исходный код самой функции и всех функций проекта,
+    которые она вызывает (например, plot_curve -> curve_point)
+    """
+    # Для обернутых декораторами функций берем исходный код оригинала
+    func = inspect.unwrap(func)
+    if func in seen:
+        return ''
+    seen.add(func)
+
+    # У лямбд исходный код - вся строка вызова, поэтому берем байткод
+    if func.__name__ == '<lambda>':
+        parts = [_code_fingerprint(func.__code__)]
+    else:
+        try:
+            parts = [inspect.getsource(func)]
+        except (OSError, TypeError):
+            parts = [_code_fingerprint(func.__code__)]
+
+    # Значения замыканий и аргументов по умолчанию тоже влияют на график
+    if func.__closure__:
+        parts.extend(fingerprint(cell.cell_contents, seen) for cell in func.__closure__)
+    if func.__defaults__:
+        parts.append(fingerprint(func.__defaults__, seen))
+
+    parts.extend(_referenced_fingerprints(func.__code__, func.__globals__, seen))
+    return '\n'.join(parts)
+
+def _referenced_fingerprints(code, namespace, seen):
+    """
+    Отпечатки функций и классов проекта, на которые ссылается код: по его
+    глобальным именам и по импортам внутри кода
+    """
+    parts = []
+    for name in sorted(_referenced_names(code)):
+        obj = namespace.get(name)
+        if not _is_project_object(obj):
+            continue
+        if isinstance(obj, type):
+            parts.append(_class_fingerprint(obj, seen))
+        else:
+            parts.append(_function_fingerprint(obj, seen))
+    for obj in _imported_objects(code):
+        if isinstance(obj, types.ModuleType):
+            # import module целиком: входит весь исходный код модуля
+            if obj not in seen:
+                seen.add(obj)
+                parts.append(inspect.getsource(obj))
+        elif isinstance(obj, type) and _is_project_object(obj):
+            parts.append(_class_fingerprint(obj, seen))
+        elif _is_project_object(obj):
+            parts.append(_function_fingerprint(obj, seen))
+    return parts
+
+def _class_fingerprint(cls, seen):
+    """
+    Отпечаток класса проекта: его исходный код, базовые классы проекта
+    и функции проекта, которые вызывают его методы (например, шаблон
+    графика -> генератор поверхности)
+    """
+    if cls in seen:
+        return ''
+    seen.add(cls)
+
+    parts = [inspect.getsource(cls)]
+    parts.extend(_class_fingerprint(base, seen) for base in cls.__bases__ if _is_project_object(base))
+    for name, member in sorted(vars(cls).items()):
+        if isinstance(member, (staticmethod, classmethod)):
+            member = member.__func__
+        elif isinstance(member, property):
+            member = member.fget
+        member = inspect.unwrap(member) if hasattr(member, '__wrapped__') else member
+        if isinstance(member, types.FunctionType):
+            parts.extend(_referenced_fingerprints(member.__code__, member.__globals__, seen))
+    return '\n'.join(parts)
+
+def fingerprint(value, seen=None):
+    """Детерминированное строковое представление аргумента функции построения"""
+    if seen is None:
+        seen = set()
+    if isinstance(value, types.FunctionType):
+        return _function_fingerprint(value, seen)
+    if _is_project_object(value):
+        return _class_fingerprint(value, seen)
+    if isinstance(value, np.ufunc):
+        return f'ufunc:{value.__name__}'
+    if isinstance(value, np.ndarray):
+        return f'ndarray:{value.dtype}:{value.shape}:{hashlib.sha256(value.tobytes()).hexdigest()}'
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__ + '(' + ','.join(fingerprint(v, seen) for v in value) + ')'
+    if isinstance(value, dict):
+        items = sorted((repr(k), fingerprint(v, seen)) for k, v in value.items())
+        return 'dict(' + ','.join(f'{k}:{v}' for k, v in items) + ')'
+    return repr(value)
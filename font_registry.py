@@ -0,0 +1,82 @@
+import hashlib
+import os
+import pickle
+from weakref import WeakKeyDictionary
+import reportlab
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFontFace
+from cache_files import PROJECT_DIR, atomic_write
+
+FONTS_DIR = os.path.join(PROJECT_DIR, 'fonts')
+CACHE_DIR = os.path.join(PROJECT_DIR, '.font_cache')
+
+# Шрифты отчета: имя для reportlab и файл в каталоге fonts
+FONTS = {
+    'Roboto': 'RobotoMono[wght].ttf',
+}
+
+def font_path(filename):
+    """Полный путь к файлу шрифта из каталога fonts проекта"""
+    path = os.path.join(FONTS_DIR, filename)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'Шрифт {filename} не найден в {FONTS_DIR}')
+    return path
+
+def _cache_path(name, path):
+    """Файл разобранного шрифта: ключ - содержимое шрифта, имя и версия reportlab"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as file:
+        h.update(file.read())
+    h.update(f'\0{name}\0reportlab={reportlab.Version}'.encode('utf-8'))
+    return os.path.join(CACHE_DIR, h.hexdigest() + '.pickle')
+
+def _dump_font(font):
+    """
+    Состояние разобранного шрифта для pickle. Масштабирующая лямбда лица
+    и словарь состояний документов не сериализуются и создаются заново
+    """
+    face = {key: value for key, value in vars(font.face).items() if key != '_pdfScale'}
+    rest = {key: value for key, value in vars(font).items() if key not in ('face', 'state')}
+    return rest, face
+
+def _load_font(rest, face_state):
+    """Восстанавливает TTFont из состояния без повторного разбора файла"""
+    face = TTFontFace.__new__(TTFontFace)
+    vars(face).update(face_state)
+    scale = 1000 / face.unitsPerEm
+    face._pdfScale = (lambda x: x) if scale == 1 else (lambda x: x * scale)
+
+    font = TTFont.__new__(TTFont)
+    vars(font).update(rest)
+    font.face = face
+    font.state = WeakKeyDictionary()
+    return font
+
+def load_font(name, filename):
+    """
+    Возвращает TTFont: из сериализованного кэша, общего для всех процессов,
+    или, если кэша нет, разбирает файл шрифта и сохраняет результат
+    """
+    path = font_path(filename)
+    cache_path = _cache_path(name, path)
+    try:
+        with open(cache_path, 'rb') as file:
+            return _load_font(*pickle.load(file))
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, TypeError):
+        pass
+
+    font = TTFont(name, path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    state = _dump_font(font)
+    atomic_write(cache_path, lambda file: pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL))
+    return font
+
+def register_fonts(fonts=FONTS):
+    """
+    Регистрирует шрифты в reportlab; в каждом процессе шрифт загружается
+    не больше одного раза, повторные вызовы ничего не делают
+    """
+    registered = set(pdfmetrics.getRegisteredFontNames())
+    for name, filename in fonts.items():
+        if name not in registered:
+            pdfmetrics.registerFont(load_font(name, filename))
@@ -0,0 +1,244 @@
+import argparse
+import functools
+import sys
+import time
+import numpy as np
+from rotations import rotation_matrices, unit_axes
+
+# Допустимая относительная погрешность тождеств в арифметике float64
+TOLERANCE = 1e-12
+
+# Образцов на тождество по умолчанию: все тождества проверяются за десятки
+# миллисекунд; 10**6 образцов дают ту же проверку за несколько секунд
+SAMPLES = 10**4
+
+def translations(shifts):
+    """Элементы T(2) - сдвиги на векторы shifts (..., 2) в однородных координатах (..., 3, 3)"""
+    shifts = np.asarray(shifts, dtype=float)
+    T = np.zeros(shifts.shape[:-1] + (3, 3))
+    T[..., 0, 0] = T[..., 1, 1] = T[..., 2, 2] = 1
+    T[..., :2, 2] = shifts
+    return T
+
+def plane_rotations(theta):
+    """Элементы SO(2) - повороты R(θ) на углы theta (...), матрицы (..., 2, 2)"""
+    c, s = np.cos(theta), np.sin(theta)
+    return np.stack([np.stack([c, -s], axis=-1), np.stack([s, c], axis=-1)], axis=-2)
+
+def plane_reflections(phi):
+    """Отражения относительно прямых под углами phi (...) к оси x, матрицы (..., 2, 2)"""
+    c, s = np.cos(2 * phi), np.sin(2 * phi)
+    return np.stack([np.stack([c, s], axis=-1), np.stack([s, -c], axis=-1)], axis=-2)
+
+def plane_symmetries(theta, reflect):
+    """
+    Элементы S(2) - повороты R(θ) и, где reflect истинно, отражения R(θ)·E,
+    E = diag(1, -1) - отражение относительно оси x
+    """
+    M = plane_rotations(theta)
+    M[..., 1] *= np.where(reflect, -1.0, 1.0)[..., np.newaxis]
+    return M
+
+def plane_basis(axes):
+    """Ортонормированные базисы (..., 3, 2) плоскостей, перпендикулярных осям (..., 3)"""
+    n = unit_axes(axes)
+    # Вспомогательный вектор берется вдоль наименьшей по модулю компоненты оси
+    helper = np.zeros_like(n)
+    np.put_along_axis(helper, np.argmin(np.abs(n), axis=-1)[..., np.newaxis], 1.0, axis=-1)
+    e1 = unit_axes(np.cross(n, helper))
+    e2 = np.cross(n, e1)
+    return np.stack([e1, e2], axis=-1)
+
+def axis_subgroup_to_plane(W, basis):
+    """Изоморфизм φ: Sn → SO(2), φ(W) = BᵀWB - действие W в плоскости, перпендикулярной оси"""
+    return np.matmul(np.swapaxes(basis, -1, -2), np.matmul(W, basis))
+
+def determinants(M):
+    """Определители матриц (..., 2, 2) или (..., 3, 3) явными формулами"""
+    if M.shape[-1] == 2:
+        return M[..., 0, 0] * M[..., 1, 1] - M[..., 0, 1] * M[..., 1, 0]
+    return np.einsum('...i,...i->...', M[..., 0, :], np.cross(M[..., 1, :], M[..., 2, :]))
+
+def _entries(M):
+    """Элементы матриц (N, ...) как список массивов (N,)"""
+    M = np.asarray(M)
+    return [M[(slice(None),) + index] for index in np.ndindex(M.shape[1:])]
+
+def _deviation(A, B):
+    """
+    Наибольшее по модулю расхождение элементов A и B для каждого образца
+    Редукция по короткой последней оси в NumPy медленная, поэтому максимум
+    берется поэлементно по всем позициям матрицы
+    """
+    difference = np.abs(np.asarray(A) - np.asarray(B))
+    return functools.reduce(np.maximum, _entries(difference))
+
+def _norm(M):
+    """Норма Фробениуса матриц (N, k, k)"""
+    return np.sqrt(functools.reduce(np.add, (entry * entry for entry in _entries(M))))
+
+def _orthogonality(M):
+    """Отклонение MᵀM от единичной матрицы"""
+    return _deviation(np.matmul(np.swapaxes(M, -1, -2), M), np.eye(M.shape[-1]))
+
+def _result(project, identity, errors, tolerance, scale=1.0):
+    """
+    Итог проверки тождества: число образцов, наибольшая относительная
+    погрешность и число образцов, где она больше допуска
+    """
+    relative = errors / np.maximum(scale, 1.0)
+    worst = int(np.argmax(relative))
+    return {
+        'project': project,
+        'identity': identity,
+        'samples': len(relative),
+        'max_error': float(relative[worst]),
+        'worst_sample': worst,
+        'tolerance': tolerance,
+        'failures': int(np.count_nonzero(relative > tolerance)),
+    }
+
+def check_translations(n_samples, rng, tolerance=TOLERANCE):
+    """T(2) ≅ R² (проект 1): φ(T) - вектор сдвига"""
+    u = rng.uniform(-10, 10, (n_samples, 2))
+    v = rng.uniform(-10, 10, (n_samples, 2))
+    Tu, Tv = translations(u), translations(v)
+    product = np.matmul(Tu, Tv)
+    scale = np.abs(u).max(axis=-1) + np.abs(v).max(axis=-1)
+    return [
+        # Замкнутость: произведение сдвигов - снова сдвиг, и φ(x ∘ y) = φ(x) + φ(y)
+        _result('project_1', 'T(u)·T(v) = T(u + v)', _deviation(product, translations(u + v)),
+                tolerance, scale),
+        _result('project_1', 'φ(T(u)·T(v)) = φ(T(u)) + φ(T(v))',
+                _deviation(product[:, :2, 2], Tu[:, :2, 2] + Tv[:, :2, 2]), tolerance, scale),
+        _result('project_1', 'T(u)·T(v) = T(v)·T(u)', _deviation(product, np.matmul(Tv, Tu)),
+                tolerance, scale),
+        # Инъективность: сдвиг восстанавливается по φ(T) однозначно
+        _result('project_1', 'T(φ(T(u))) = T(u)', _deviation(translations(Tu[:, :2, 2]), Tu),
+                tolerance, scale),
+    ]
+
+def check_reflection_rotation(n_samples, rng, tolerance=TOLERANCE, project='project_3', unit=False):
+    """
+    S(2) и SO(2) не коммутируют (проекты 3 и 4): S·R(θ) = R(-θ)·S, поэтому
+    |SR - RS| = 2√2·|sin θ| и SR = RS только при sin θ = 0
+    unit - брать отражение E = diag(1, -1) (единицу S(2) в проекте 4), а не случайное
+    """
+    theta = rng.uniform(-np.pi, np.pi, n_samples)
+    phi = np.zeros(n_samples) if unit else rng.uniform(-np.pi, np.pi, n_samples)
+    S, R = plane_reflections(phi), plane_rotations(theta)
+    SR, RS = np.matmul(S, R), np.matmul(R, S)
+    gap = _norm(SR - RS)
+    name = 'E' if unit else 'S'
+    results = [
+        _result(project, f'{name}·R(θ) = R(-θ)·{name}', _deviation(SR, np.matmul(plane_rotations(-theta), S)),
+                tolerance),
+        _result(project, f'|{name}R - R{name}| = 2√2·|sin θ|', np.abs(gap - 2 * np.sqrt(2) * np.abs(np.sin(theta))),
+                tolerance),
+    ]
+    if not unit:
+        # Замкнутость S(2): произведения поворотов и отражений ортогональны с det = ±1
+        a = plane_symmetries(theta, rng.random(n_samples) < 0.5)
+        b = plane_symmetries(rng.uniform(-np.pi, np.pi, n_samples), rng.random(n_samples) < 0.5)
+        ab = np.matmul(a, b)
+        results.append(_result(project, 'S(2)·S(2) ⊂ S(2): (ab)ᵀab = I', _orthogonality(ab), tolerance))
+        results.append(_result(project, 'det(ab) = det(a)·det(b) = ±1',
+                               np.abs(determinants(ab) - determinants(a) * determinants(b))
+                               + np.abs(np.abs(determinants(ab)) - 1), tolerance))
+    return results
+
+def check_unit_reflection(n_samples, rng, tolerance=TOLERANCE):
+    """Единица E группы S(2) не коммутирует с SO(2) (проект 4)"""
+    return check_reflection_rotation(n_samples, rng, tolerance, project='project_4', unit=True)
+
+def check_rotation_determinant(n_samples, rng, tolerance=TOLERANCE):
+    """det Wn(θ) = 1 и Wn(θ) ортогональна (проект 6)"""
+    W = rotation_matrices(rng.normal(size=(n_samples, 3)), rng.uniform(-np.pi, np.pi, n_samples))
+    return [
+        _result('project_6', 'det Wn(θ) = 1', np.abs(determinants(W) - 1), tolerance),
+        _result('project_6', 'Wn(θ)ᵀWn(θ) = I', _orthogonality(W), tolerance),
+    ]
+
+def check_axis_subgroup(n_samples, rng, tolerance=TOLERANCE):
+    """
+    Sn ≅ SO(2) (проект 9): для случайных осей n и углов θ₁, θ₂ проверяются
+    φ(Wn(θ)) = R(θ), гомоморфизм, замкнутость Sn и то, что φ сохраняет
+    расстояния между элементами (отсюда инъективность)
+    """
+    axes = unit_axes(rng.normal(size=(n_samples, 3)))
+    theta1 = rng.uniform(-np.pi, np.pi, n_samples)
+    theta2 = rng.uniform(-np.pi, np.pi, n_samples)
+    W1, W2 = rotation_matrices(axes, theta1), rotation_matrices(axes, theta2)
+    basis = plane_basis(axes)
+    phi1, phi2 = axis_subgroup_to_plane(W1, basis), axis_subgroup_to_plane(W2, basis)
+    product = np.matmul(W1, W2)
+    distance = _norm(W1 - W2)
+    image_distance = _norm(phi1 - phi2)
+    return [
+        _result('project_9', 'φ(Wn(θ)) = R(θ)', _deviation(phi1, plane_rotations(theta1)), tolerance),
+        _result('project_9', 'φ(Wn(θ₁)·Wn(θ₂)) = φ(Wn(θ₁))·φ(Wn(θ₂))',
+                _deviation(axis_subgroup_to_plane(product, basis), np.matmul(phi1, phi2)), tolerance),
+        _result('project_9', 'Wn(θ₁)·Wn(θ₂) = Wn(θ₁ + θ₂)',
+                _deviation(product, rotation_matrices(axes, theta1 + theta2)), tolerance),
+        _result('project_9', '|φ(W₁) - φ(W₂)| = |W₁ - W₂|', np.abs(image_distance - distance), tolerance),
+        _result('project_9', 'R(θ₁)·R(θ₂) = R(θ₂)·R(θ₁)', _deviation(np.matmul(phi1, phi2), np.matmul(phi2, phi1)),
+                tolerance),
+        _result('project_9', 'det R(θ) = 1', np.abs(determinants(phi1) - 1), tolerance),
+    ]
+
+# Проверки утверждений со вторых страниц проектов
+CHECKS = {
+    'project_1': check_translations,
+    'project_3': check_reflection_rotation,
+    'project_4': check_unit_reflection,
+    'project_6': check_rotation_determinant,
+    'project_9': check_axis_subgroup,
+}
+
+def verify_groups(projects=None, n_samples=SAMPLES, seed=0, tolerance=TOLERANCE):
+    """
+    Проверяет групповые тождества проектов projects (по умолчанию всех из CHECKS)
+    на n_samples случайных элементах за один векторный проход на проверку
+    Возвращает список итогов по тождествам
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for project in projects or CHECKS:
+        results.extend(CHECKS[project](n_samples, rng, tolerance))
+    return results
+
+def summary(project, n_samples=SAMPLES, seed=0):
+    """Строка для страницы проекта: число проверенных тождеств и наибольшая погрешность"""
+    results = verify_groups([project], n_samples, seed)
+    worst = max(result['max_error'] for result in results)
+    line = f'Численно ({n_samples} образцов) проверено тождеств: {len(results)}, погрешность ≤ {worst:.1e}'
+    failed = sum(result['failures'] > 0 for result in results)
+    return line + (f', нарушено: {failed}' if failed else '')
+
+def main():
+    parser = argparse.ArgumentParser(description='Численная проверка групповых тождеств из проектов')
+    parser.add_argument('--samples', type=int, default=SAMPLES,
+                        help='число случайных элементов на тождество (10**6 - несколько секунд)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='допустимая относительная погрешность')
+    parser.add_argument('projects', nargs='*', metavar='PROJECT',
+                        help=f'проекты для проверки: {", ".join(CHECKS)} (по умолчанию все)')
+    args = parser.parse_args()
+    unknown = [project for project in args.projects if project not in CHECKS]
+    if unknown:
+        parser.error(f'нет проверок для {", ".join(unknown)}')
+
+    start = time.perf_counter()
+    results = verify_groups(args.projects, args.samples, args.seed, args.tolerance)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        status = 'ok' if result['failures'] == 0 else f'FAIL ({result["failures"]})'
+        print(f'{result["project"]:10} {result["identity"]:45} {result["max_error"]:9.1e}  {status}')
+    failed = sum(result['failures'] > 0 for result in results)
+    print(f'Тождеств: {len(results)}, образцов: {args.samples}, время {elapsed * 1000:.0f} мс; не выполнено: {failed}')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from cache_files import PROJECT_DIR
+
+# Строка отчета интерпретатора с -X importtime:
+# "import time: <собственное, мкс> | <суммарное, мкс> | <отступ><модуль>"
+_IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)')
+
+def measure_imports(modules):
+    """
+    Импортирует modules в новом процессе с холодного старта под -X importtime
+    Возвращает записи (модуль, собственное время, суммарное время, глубина)
+    в микросекундах и полное время процесса в секундах
+    """
+    code = '; '.join(f'import {module}' for module in modules)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries, elapsed
+
+def format_report(entries, elapsed, modules, top=10):
+    """
+    Отчет о времени запуска: суммарное время импорта каждого из modules
+    и собственное время импорта, сгруппированное по пакетам
+    """
+    by_name = {name: cumulative for name, _, cumulative, _ in entries}
+    packages = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        packages[name.split('.')[0]] += self_us
+    total = sum(packages.values())
+
+    lines = [f'Запуск процесса: {elapsed * 1000:.0f} мс, из них импорт: {total / 1000:.0f} мс',
+             '',
+             'Модули (общие зависимости учитываются у первого импортировавшего):']
+    for module in modules:
+        lines.append(f'  {module:<28} {by_name.get(module, 0) / 1000:8.1f} мс')
+
+    lines += ['', 'Пакеты по собственному времени импорта:']
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f'  {package:<28} {self_us / 1000:8.1f} мс {100 * self_us / total:5.1f}%')
+    return '\n'.join(lines)
+
+def startup_report(modules, top=10):
+    """Измеряет холодный импорт modules и возвращает текст отчета"""
+    entries, elapsed = measure_imports(modules)
+    return format_report(entries, elapsed, modules, top)
@@ -1,82 +1,192 @@
 from report_generator import ReportGenerator
-import project_1
-import project_2
-import project_3
-import project_4
-import project_5
-import project_6
-import project_7
-import project_8
-import project_9
-import project_10
-import time
+from build_cache import load_built_page, page_key, store_built_page
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from tracing import flush as flush_trace, span, start_trace, write_trace
+import argparse
+import importlib
 import os
+import shutil
+import sys
+import tempfile
 
-def generate_full_report():
-    """Генерация полного отчета"""
-    report_gen = ReportGenerator()
-    
+# Страницы отчета в порядке следования: модуль проекта, функция построения
+# и ее параметры. Модули импортируются только для выбранных страниц
+PAGES = [
+    ('project_1', 'create_report_simple', (2, 3)),
+    ('project_2', 'create_report', (2, 1)),
+    ('project_3', 'create_report', ()),
+    ('project_4', 'create_report', ()),
+    ('project_5', 'create_report', (2, 1)),
+    ('project_6', 'create_report', (2, 0.5)),
+    ('project_7', 'create_report', (2, 3, 1, 1.5, 0.5)),
+    ('project_8', 'create_report', ()),
+    ('project_9', 'create_report', ()),
+    ('project_10', 'create_report', ()),
+]
+
+def load_page(module_name, function_name):
+    """Импортирует модуль проекта при первом обращении и возвращает функцию построения"""
+    with span(f'import {module_name}', 'import'):
+        return getattr(importlib.import_module(module_name), function_name)
+
+def select_pages(page_numbers=None):
+    """Номера и описания страниц; page_numbers - номера проектов с единицы или None для всех"""
+    numbered = list(enumerate(PAGES, start=1))
+    if page_numbers is None:
+        return numbered
+    return [numbered[n - 1] for n in page_numbers]
+
+@contextmanager
+def page_workdir(report_gen, page_number):
+    """Переходит в изолированную рабочую директорию страницы"""
+    # Временные изображения проекта не пересекаются с другими страницами
+    scratch_dir = report_gen.create_scratch_dir(page_number)
+    cwd = os.getcwd()
+    os.chdir(scratch_dir)
     try:
-        # Создаем временную директорию для изображений
-        if not os.path.exists('temp'):
-            os.makedirs('temp')
-        
-        # Генерируем все отчеты с использованием общего генератора
-        canvas1, filepath1 = report_gen.create_new_canvas()
-        project_1.create_report_simple(2, 3, canvas1)
-        canvas1.save()
-        
-        canvas2, filepath2 = report_gen.create_new_canvas()
-        project_2.create_report(2, 1, canvas2)
-        canvas2.save()
-        
-        canvas3, filepath3 = report_gen.create_new_canvas()
-        project_3.create_report(canvas3)
-        canvas3.save()
-        
-        canvas4, filepath4 = report_gen.create_new_canvas()
-        project_4.create_report(canvas4)
-        canvas4.save()
-        
-        canvas5, filepath5 = report_gen.create_new_canvas()
-        project_5.create_report(canvas5)
-        canvas5.save()
-        
-        canvas6, filepath6 = report_gen.create_new_canvas()
-        project_6.create_report(canvas6)
-        canvas6.save()
+        yield scratch_dir
+    finally:
+        os.chdir(cwd)
+
+def render_page(page_number, module_name, function_name, args, in_memory=False):
+    """
+    Строит одну страницу отчета в изолированной рабочей директории
+    Возвращает путь к файлу страницы или, в режиме in_memory, байты PDF
+    """
+    with span(f'page {page_number}', 'page', module=module_name):
+        create_report = load_page(module_name, function_name)
+        report_gen = ReportGenerator(in_memory=in_memory)
+        canvas, target = report_gen.create_new_canvas(page_number)
         
-        canvas7, filepath7 = report_gen.create_new_canvas()
-        project_7.create_report(canvas7)
-        canvas7.save()
+        with page_workdir(report_gen, page_number):
+            with span(f'{module_name}.{function_name}', 'project'):
+                create_report(*args, canvas)
+            with span('canvas.save', 'pdf'):
+                canvas.save()
+    
+    # Рабочий процесс сохраняет свои события до возврата результата
+    flush_trace()
+    return target.getvalue() if in_memory else target
+
+def render_document(report_gen, output, pages):
+    """Рисует проекты pages подряд на одном холсте и сохраняет документ в output"""
+    canvas = report_gen.create_document_canvas(output)
+    
+    for index, (page_number, (module_name, function_name, args)) in enumerate(pages):
+        if index > 0:
+            # Последняя страница проекта закрывается перед следующим проектом
+            canvas.showPage()
+            canvas.setFont('Roboto', 12)
+        create_report = load_page(module_name, function_name)
+        with page_workdir(report_gen, page_number):
+            with span(f'{module_name}.{function_name}', 'project', page=page_number):
+                create_report(*args, canvas)
+    
+    with span('canvas.save', 'pdf'):
+        canvas.save()
+
+def generate_full_report(jobs=None, in_memory=False, single_document=False,
+                         output='computer_graphics_report.pdf', page_numbers=None,
+                         incremental=False):
+    """
+    Генерация полного отчета
+    output - имя файла или поток, в который пишется итоговый документ
+    single_document - все проекты рисуются на одном холсте без объединения
+    page_numbers - номера проектов, которые войдут в отчет (по умолчанию все)
+    incremental - заново строятся только страницы, входные данные которых
+    изменились с прошлой сборки, остальные берутся из кэша сборки
+    """
+    if incremental and single_document:
+        raise ValueError('Инкрементальная сборка работает только с объединением страниц')
+    selected = select_pages(page_numbers)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    
+    report_gen = ReportGenerator(in_memory=in_memory or single_document)
+    
+    try:
+        if single_document:
+            render_document(report_gen, output, selected)
+            return
         
-        canvas8, filepath8 = report_gen.create_new_canvas()
-        project_8.create_report(canvas8)
-        canvas8.save()
+        tasks = [(page_number, module_name, function_name, args, in_memory)
+                 for page_number, (module_name, function_name, args) in selected]
         
-        canvas9, filepath9 = report_gen.create_new_canvas()
-        project_9.create_report(canvas9)
-        canvas9.save()
+        if incremental:
+            # Страницы с прежним отпечатком берутся из кэша сборки без импорта модулей
+            keys = {page_number: page_key(*page) for page_number, page in selected}
+            built = {page_number: load_built_page(page[0], keys[page_number])
+                     for page_number, page in selected}
+            tasks = [(page_number, module_name, function_name, args, True)
+                     for page_number, module_name, function_name, args, _ in tasks
+                     if built[page_number] is None]
+            print(f'Пересобирается страниц: {len(tasks)} из {len(selected)}', file=sys.stderr)
         
-        canvas10, filepath10 = report_gen.create_new_canvas()
-        project_10.create_report(canvas10)
-        canvas10.save()
+        if jobs > 1 and len(tasks) > 1:
+            # Каждая страница строится в отдельном процессе
+            with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+                futures = [executor.submit(render_page, *task) for task in tasks]
+                pages = [future.result() for future in futures]
+        else:
+            pages = [render_page(*task) for task in tasks]
         
-        # Даем время на завершение записи файлов
-        time.sleep(1)
+        if incremental:
+            for (page_number, module_name, _, _, _), data in zip(tasks, pages):
+                store_built_page(module_name, keys[page_number], data)
+                built[page_number] = data
+            pages = [built[page_number] for page_number, _ in selected]
         
-        # Объединяем все отчеты в один файл
-        report_gen.merge_reports()
+        # Объединяем все отчеты в один документ в порядке проектов
+        report_gen.merge_reports(output, sources=pages)
         
     except Exception as e:
         print(f"Ошибка при генерации отчета: {str(e)}")
         raise
     
     finally:
-        # Даем время на завершение всех операций
-        time.sleep(1)
         # Очищаем временные файлы
         report_gen.cleanup()
 
 if __name__ == "__main__":
-    generate_full_report() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Генерация отчета по компьютерной графике')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='число параллельных процессов (по умолчанию - число ядер)')
+    parser.add_argument('--in-memory', action='store_true',
+                        help='собирать страницы в памяти, без временных PDF файлов')
+    parser.add_argument('--single-document', action='store_true',
+                        help='рисовать все проекты на одном холсте без объединения страниц')
+    parser.add_argument('--output', default='computer_graphics_report.pdf',
+                        help="итоговый файл; '-' - запись в стандартный вывод")
+    parser.add_argument('--pages', type=int, nargs='+', metavar='N',
+                        help='номера проектов, которые войдут в отчет (по умолчанию все)')
+    parser.add_argument('--import-times', action='store_true',
+                        help='вывести время импорта модулей выбранных страниц и выйти')
+    parser.add_argument('--incremental', action='store_true',
+                        help='строить заново только измененные страницы, остальные брать из кэша сборки')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='записать трассировку в формате Chrome trace event (для Perfetto)')
+    args = parser.parse_args()
+    
+    if args.import_times:
+        from import_timing import startup_report
+        modules = ['report_generator'] + [module_name for _, (module_name, _, _) in select_pages(args.pages)]
+        print(startup_report(modules))
+        sys.exit()
+    
+    if args.trace:
+        # Трассировка включается до запуска рабочих процессов, они наследуют настройку
+        trace_dir = tempfile.mkdtemp(prefix='report_trace_')
+        start_trace(trace_dir)
+    
+    output = sys.stdout.buffer if args.output == '-' else args.output
+    try:
+        with span('generate_full_report', 'report', jobs=args.jobs):
+            generate_full_report(jobs=args.jobs, in_memory=args.in_memory,
+                                 single_document=args.single_document, output=output,
+                                 page_numbers=args.pages, incremental=args.incremental)
+    finally:
+        if args.trace:
+            count = write_trace(args.trace)
+            shutil.rmtree(trace_dir, ignore_errors=True)
+            print(f'Трассировка: {count} событий записано в {args.trace}', file=sys.stderr)
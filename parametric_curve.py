@@ -0,0 +1,74 @@
+import numpy as np
+
+class ParametricCurve:
+    """
+    Параметрическая кривая r(u) на плоскости или в пространстве
+
+    point, derivative и second_derivative - функции, которые принимают
+    массив параметров u и возвращают координаты (x, y) или (x, y, z)
+    как кортеж массивов. Все методы вычисляют значения для всего массива
+    параметров за один проход NumPy и возвращают массив формы (dim, N),
+    где каждая строка - одна координата (структура массивов).
+    """
+
+    def __init__(self, point, derivative, second_derivative=None):
+        self.point = point
+        self.derivative = derivative
+        self.second_derivative = second_derivative
+
+    @staticmethod
+    def _evaluate(func, u):
+        """Вычисляет функцию и приводит константные координаты к форме u"""
+        u = np.asarray(u, dtype=float)
+        components = func(u)
+        return np.array([np.broadcast_to(c, u.shape) for c in components], dtype=float)
+
+    def points(self, u):
+        """Точки кривой r(u)"""
+        return self._evaluate(self.point, u)
+
+    def velocities(self, u):
+        """Первая производная r'(u)"""
+        return self._evaluate(self.derivative, u)
+
+    def accelerations(self, u):
+        """Вторая производная r''(u)"""
+        if self.second_derivative is None:
+            raise ValueError('Для кривой не задана вторая производная')
+        return self._evaluate(self.second_derivative, u)
+
+    def tangents(self, u):
+        """Единичные касательные векторы T(u) = r'(u) / |r'(u)|"""
+        d = self.velocities(u)
+        return d / np.sqrt(np.einsum('i...,i...->...', d, d))
+
+    def normals(self, u):
+        """
+        Единичные нормальные векторы
+        На плоскости - касательный вектор, повернутый на 90 градусов,
+        в пространстве - главная нормаль N = (r'' - (r''·T)T) / |r'' - (r''·T)T|
+        """
+        t = self.tangents(u)
+        if t.shape[0] == 2:
+            return np.array([-t[1], t[0]])
+
+        dd = self.accelerations(u)
+        n = dd - np.einsum('i...,i...->...', dd, t) * t
+        return n / np.sqrt(np.einsum('i...,i...->...', n, n))
+
+    def curvature(self, u):
+        """
+        Кривизна κ(u) = |r' × r''| / |r'|³
+        На плоскости векторное произведение сводится к x'y'' - y'x''
+        """
+        d = self.velocities(u)
+        dd = self.accelerations(u)
+        speed = np.sqrt(np.einsum('i...,i...->...', d, d))
+
+        if d.shape[0] == 2:
+            cross_norm = np.abs(d[0] * dd[1] - d[1] * dd[0])
+        else:
+            cross = np.cross(d, dd, axis=0)
+            cross_norm = np.sqrt(np.einsum('i...,i...->...', cross, cross))
+
+        return cross_norm / speed**3
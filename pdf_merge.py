@@ -0,0 +1,204 @@
+import hashlib
+import io
+import mmap
+from contextlib import contextmanager
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject,
+                            NumberObject, StreamObject)
+
+# Номера объектов, которые пишутся последними: каталог и корень дерева страниц
+_CATALOG = 1
+_PAGES = 2
+
+# Атрибуты, которые страница может наследовать от узлов дерева страниц
+_INHERITED = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+class StreamingPdfMerger:
+    """
+    Объединяет PDF, копируя объекты страниц в выходной поток по мере чтения
+    В памяти остаются только таблица смещений и хеши записанных объектов,
+    поэтому расход памяти почти не зависит от числа страниц. Объекты
+    с одинаковым содержимым (изображения, шрифты, наборы ресурсов)
+    записываются один раз
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.position = 0
+        self.offsets = {}
+        self.next_number = _PAGES + 1
+        self.kids = []
+        self.digests = {}
+        self.duplicates = 0
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _write(self, data):
+        self.output.write(data)
+        self.position += len(data)
+
+    def _allocate(self):
+        number = self.next_number
+        self.next_number += 1
+        return number
+
+    def _write_object(self, number, data):
+        self.offsets[number] = self.position
+        self._write(b'%d 0 obj\n' % number + data + b'\nendobj\n')
+
+    @staticmethod
+    def _serialize(obj):
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def append(self, source):
+        """Дописывает все страницы source (путь, байты или поток) в выходной документ"""
+        with _open_source(source) as stream:
+            reader = PdfReader(stream)
+            # Соответствие номеров объектов входного файла и выходного;
+            # живет только пока копируется этот файл
+            mapped = {}
+            pending = set()
+            reserved = {}
+
+            for page in reader.pages:
+                self._copy_page(reader, page, mapped, pending, reserved)
+
+    def _copy_page(self, reader, page, mapped, pending, reserved):
+        number = self._allocate()
+        # Ссылки на страницу (например, из аннотаций) указывают на ее новый номер
+        mapped[page.indirect_reference.idnum] = number
+
+        copy = DictionaryObject()
+        for key, value in page.items():
+            if key != '/Parent':
+                copy[NameObject(key)] = self._copy(value, reader, mapped, pending, reserved)
+        # Унаследованные атрибуты переносятся в саму страницу
+        for key in _INHERITED:
+            if key not in copy:
+                inherited = _inherited_attribute(page, key)
+                if inherited is not None:
+                    copy[NameObject(key)] = self._copy(inherited, reader, mapped, pending, reserved)
+        copy[NameObject('/Parent')] = IndirectObject(_PAGES, 0, None)
+
+        self._write_object(number, self._serialize(copy))
+        self.kids.append(number)
+
+    def _copy(self, value, reader, mapped, pending, reserved):
+        """Копирует значение, заменяя ссылки на объекты входного файла выходными номерами"""
+        if isinstance(value, IndirectObject):
+            return IndirectObject(self._copy_indirect(value, reader, mapped, pending, reserved), 0, None)
+        if isinstance(value, StreamObject):
+            copy = value.__class__()
+            copy._data = value._data
+            for key, item in value.items():
+                copy[NameObject(key)] = self._copy(item, reader, mapped, pending, reserved)
+            return copy
+        if isinstance(value, DictionaryObject):
+            copy = DictionaryObject()
+            for key, item in value.items():
+                copy[NameObject(key)] = self._copy(item, reader, mapped, pending, reserved)
+            return copy
+        if isinstance(value, ArrayObject):
+            return ArrayObject(self._copy(item, reader, mapped, pending, reserved) for item in value)
+        return value
+
+    def _copy_indirect(self, reference, reader, mapped, pending, reserved):
+        """
+        Записывает косвенный объект после всех объектов, на которые он ссылается,
+        чтобы его байты уже содержали выходные номера и одинаковые объекты
+        совпадали побайтно. Объекту в цикле ссылок номер выделяется заранее
+        """
+        key = reference.idnum
+        if key in mapped:
+            return mapped[key]
+        if key in pending:
+            if key not in reserved:
+                reserved[key] = self._allocate()
+            return reserved[key]
+
+        pending.add(key)
+        data = self._serialize(self._copy(reference.get_object(), reader, mapped, pending, reserved))
+        pending.discard(key)
+
+        if key in reserved:
+            number = reserved.pop(key)
+            self._write_object(number, data)
+        else:
+            digest = hashlib.sha256(data).digest()
+            number = self.digests.get(digest)
+            if number is None:
+                number = self._allocate()
+                self._write_object(number, data)
+                self.digests[digest] = number
+            else:
+                self.duplicates += 1
+
+        mapped[key] = number
+        return number
+
+    def close(self):
+        """Записывает дерево страниц, каталог, таблицу xref и трейлер"""
+        pages = DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Count'): NumberObject(len(self.kids)),
+            NameObject('/Kids'): ArrayObject(IndirectObject(n, 0, None) for n in self.kids),
+        })
+        self._write_object(_PAGES, self._serialize(pages))
+        catalog = DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(_PAGES, 0, None),
+        })
+        self._write_object(_CATALOG, self._serialize(catalog))
+
+        xref = self.position
+        size = self.next_number
+        lines = [b'xref\n0 %d\n' % size, b'0000000000 65535 f \n']
+        for number in range(1, size):
+            # Номера, выделенные под несостоявшиеся объекты, помечаются свободными
+            offset = self.offsets.get(number)
+            lines.append(b'%010d 00000 n \n' % offset if offset is not None else b'0000000000 00000 f \n')
+        self._write(b''.join(lines))
+        self._write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                    % (size, _CATALOG, xref))
+        self.output.flush()
+
+def _inherited_attribute(page, key):
+    """Значение атрибута key, унаследованное страницей от родительских узлов"""
+    node = page.get('/Parent')
+    while node is not None:
+        node = node.get_object()
+        if key in node:
+            return node[key]
+        node = node.get('/Parent')
+    return None
+
+@contextmanager
+def _open_source(source):
+    """Поток для чтения PDF: файл отображается в память, байты и буферы читаются как есть"""
+    if isinstance(source, bytes):
+        yield io.BytesIO(source)
+    elif hasattr(source, 'read'):
+        source.seek(0)
+        yield source
+    else:
+        with open(source, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+def merge_pdfs(sources, output):
+    """
+    Объединяет sources (пути, байты или потоки) в output (путь или поток с write)
+    Возвращает число объектов, которые не пришлось записывать повторно
+    """
+    if hasattr(output, 'write'):
+        return _merge_into(sources, output)
+    with open(output, 'wb', buffering=1024 * 1024) as file:
+        return _merge_into(sources, file)
+
+def _merge_into(sources, output):
+    merger = StreamingPdfMerger(output)
+    for source in sources:
+        merger.append(source)
+    merger.close()
+    return merger.duplicates
@@ -1,65 +1,97 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
-import io
+from reportlab_backend import draw_figure
+from parametric_curve import ParametricCurve
+from curve_sampling import sample_curve
+from figure_templates import FigureTemplate, template_figure
+
+def make_curve(a, b):
+    """Кривая (a*cos(u), b(1-e^(-u/2))) как ParametricCurve"""
+    return ParametricCurve(
+        lambda u: (a * np.cos(u), b * (1 - np.exp(-u/2))),
+        lambda u: (-a * np.sin(u), b / 2 * np.exp(-u/2)),
+        lambda u: (-a * np.cos(u), -b / 4 * np.exp(-u/2)),
+    )
 
 def curve_point(u, a, b):
-    """Вычисляет точку на кривой для заданного параметра u"""
-    x = a * np.cos(u)
-    y = b * (1 - np.exp(-u/2))
-    return np.array([x, y])
+    """Вычисляет точку на кривой для заданного параметра u (или массива параметров)"""
+    return make_curve(a, b).points(u)
 
 def tangent_vector(u, a, b):
     """Вычисляет касательный вектор к кривой"""
-    dx = -2 * a * np.sin(u)
-    dy = b * np.exp(-u/2)
-    norm = np.sqrt(4 * a**2 * np.sin(u)**2 + b**2 * np.exp(-u))
-    return np.array([dx, dy]) / norm
+    return make_curve(a, b).tangents(u)
 
 def normal_vector(u, a, b):
     """Вычисляет нормальный вектор к кривой"""
-    t = tangent_vector(u, a, b)
-    # Поворачиваем касательный вектор на 90 градусов
-    return np.array([-t[1], t[0]])
+    # Касательный вектор, повернутый на 90 градусов
+    return make_curve(a, b).normals(u)
 
-def plot_curve(a, b):
-    """Строит кривую и векторы"""
-    # Создаем массив параметра u
-    u = np.linspace(0, 2*np.pi, 1000)
-    
-    # Вычисляем точки кривой
-    points = np.array([curve_point(ui, a, b) for ui in u])
-    
-    # Создаем график
-    plt.figure(figsize=(10, 10))
-    plt.plot(points[:, 0], points[:, 1], 'b-', label='Кривая')
-    
-    # Добавляем несколько касательных и нормальных векторов
-    u_samples = np.linspace(0, 2*np.pi, 8)
-    for ui in u_samples:
-        point = curve_point(ui, a, b)
-        tangent = tangent_vector(ui, a, b)
-        normal = normal_vector(ui, a, b)
+class CurveTemplate(FigureTemplate):
+    """Шаблон графика кривой с касательными и нормалями в восьми точках"""
+
+    figsize = (10, 10)
+    n_vectors = 8
+
+    def setup(self, fig):
+        self.ax = fig.add_subplot(111)
+        self.line, = self.ax.plot([], [], 'b-', label='Кривая')
         
-        # Рисуем касательный вектор
-        plt.arrow(point[0], point[1], tangent[0], tangent[1], 
-                 color='r', head_width=0.1, head_length=0.1)
+        # Стрелки создаются один раз, при обновлении меняются их координаты
+        self.tangents = [self.ax.arrow(0, 0, 1, 0, color='r', head_width=0.1, head_length=0.1)
+                         for _ in range(self.n_vectors)]
+        self.normals = [self.ax.arrow(0, 0, 0, 1, color='g', head_width=0.1, head_length=0.1)
+                        for _ in range(self.n_vectors)]
+        
+        self.ax.grid(True)
+        self.ax.set_aspect('equal', adjustable='datalim')
+        self.ax.legend()
+        self.ax.set_title('Кривая с касательными (красные) и нормалями (зеленые)')
+
+    def update(self, a, b):
+        curve = make_curve(a, b)
         
-        # Рисуем нормальный вектор
-        plt.arrow(point[0], point[1], normal[0], normal[1], 
-                 color='g', head_width=0.1, head_length=0.1)
+        # Адаптивная выборка: точки сгущаются там, где кривая сильнее изгибается
+        self.line.set_data(*sample_curve(curve.points, 0, 2*np.pi))
+        
+        u_samples = np.linspace(0, 2*np.pi, self.n_vectors)
+        points = curve.points(u_samples)
+        tangents = curve.tangents(u_samples)
+        normals = curve.normals(u_samples)
+        for i, (point, tangent, normal) in enumerate(zip(points.T, tangents.T, normals.T)):
+            self.tangents[i].set_data(x=point[0], y=point[1], dx=tangent[0], dy=tangent[1])
+            self.normals[i].set_data(x=point[0], y=point[1], dx=normal[0], dy=normal[1])
+        
+        # Пределы осей пересчитываются по новым данным
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+def plot_curve(a, b):
+    """Строит кривую и векторы"""
+    return template_figure(CurveTemplate, a, b)
+
+def numeric_results(a, b, n_points=4096):
+    """
+    Длина кривой и наибольшая кривизна на отрезке 0 ≤ u ≤ 2π
+    a и b могут быть массивами, тогда значения вычисляются сразу для всех вариантов
+    """
+    a = np.asarray(a, dtype=float)[..., np.newaxis]
+    b = np.asarray(b, dtype=float)[..., np.newaxis]
+    u = np.linspace(0, 2*np.pi, n_points)
+    u = np.broadcast_to(u, np.broadcast_shapes(a.shape, b.shape, u.shape))
+    curve = make_curve(a, b)
     
-    plt.grid(True)
-    plt.axis('equal')
-    plt.legend()
-    plt.title('Кривая с касательными (красные) и нормалями (зеленые)')
-    return plt.gcf()  # Возвращаем текущую фигуру
+    # Длина дуги - интеграл скорости по формуле трапеций
+    speed = np.sqrt(np.sum(curve.velocities(u)**2, axis=0))
+    length = np.sum((speed[..., 1:] + speed[..., :-1]) / 2 * np.diff(u), axis=-1)
+    return {
+        'arc_length': length,
+        'max_curvature': np.max(curve.curvature(u), axis=-1),
+    }
 
 def create_report_simple(a, b, canvas):
     """Создает PDF отчет с использованием переданного canvas"""
+    # Численные проверки групп нужны только тексту отчета, модуль страницы их не загружает
+    from group_checks import summary
+
     # Заголовок
     canvas.drawString(50, 800, 'Проект 1-1')
     
@@ -68,13 +100,8 @@ def create_report_simple(a, b, canvas):
     canvas.drawString(50, 750, f'(u, ((a*cos(u))i + b(1-e^(-u/2))j)), 0 ≤ u < ∞')
     canvas.drawString(50, 730, f'где a={a} и b={b} – действительные числа.')
     
-    # Сохраняем график во временный файл
-    fig = plot_curve(a, b)
-    fig.savefig('temp_plot.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
-    
-    # Добавляем график из файла
-    canvas.drawImage('temp_plot.png', 50, 300, width=500, height=400)
+    # Рисуем график векторно прямо на странице
+    draw_figure(plot_curve(a, b), canvas, 50, 300, 500, 400)
     
     # Добавляем описание
     canvas.drawString(50, 280, 'На графике:')
@@ -99,6 +126,9 @@ def create_report_simple(a, b, canvas):
     ]:
         canvas.drawString(50, y, line)
         y -= 20
+    
+    # Численная проверка тождеств на случайных сдвигах
+    canvas.drawString(50, y - 10, summary('project_1'))
 
 if __name__ == "__main__":
     # Для локального тестирования
@@ -1,12 +1,9 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from sympy import symbols, solve, Matrix, simplify, latex
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
-from utils import setup_latex, save_figure_to_temp, render_latex_to_file
+from figure_cache import draw_cached_figure
+from surface_mesh import grid_points
+from utils import MATHTEXT_RC, draw_formula, render_formulas
 
 def find_normal_line():
     """Находит параметрическое уравнение нормали к плоскости"""
@@ -25,38 +22,40 @@ def find_normal_line():
 
 def plot_plane_and_normal():
     """Визуализирует плоскость и нормаль"""
-    setup_latex()
-    fig = plt.figure(figsize=(12, 8))
-    ax = fig.add_subplot(111, projection='3d')
+    # Подписи - простые формулы, mathtext набирает их без запуска TeX
+    with plt.rc_context(MATHTEXT_RC):
+        fig = plt.figure(figsize=(12, 8))
+        ax = fig.add_subplot(111, projection='3d')
     
-    # Создаем сетку точек для плоскости
-    x = np.linspace(-5, 5, 100)
-    y = np.linspace(-5, 5, 100)
-    X, Y = np.meshgrid(x, y)
-    Z = -(X - Y - 3) / 3
+        # Создаем сетку точек для плоскости; плоскость не искривлена,
+        # поэтому по каждому направлению хватает двух точек
+        x = np.linspace(-5, 5, grid_points(0, 10, extent=10))
+        y = np.linspace(-5, 5, grid_points(0, 10, extent=10))
+        X, Y = np.meshgrid(x, y)
+        Z = -(X - Y - 3) / 3
     
-    # Строим плоскость
-    surf = ax.plot_surface(X, Y, Z, alpha=0.5)
+        # Строим плоскость
+        surf = ax.plot_surface(X, Y, Z, alpha=0.5)
     
-    point, normal = find_normal_line()
+        point, normal = find_normal_line()
     
-    # Строим нормаль
-    t = np.linspace(-2, 2, 100)
-    X_normal = point[0] + normal[0] * t[:, np.newaxis]
-    Y_normal = point[1] + normal[1] * t[:, np.newaxis]
-    Z_normal = point[2] + normal[2] * t[:, np.newaxis]
+        # Строим нормаль
+        t = np.linspace(-2, 2, 100)
+        X_normal = point[0] + normal[0] * t[:, np.newaxis]
+        Y_normal = point[1] + normal[1] * t[:, np.newaxis]
+        Z_normal = point[2] + normal[2] * t[:, np.newaxis]
     
-    ax.plot(X_normal, Y_normal, Z_normal, 'r-', linewidth=2, 
-           label=r'$\vec{n}$')
+        ax.plot(X_normal, Y_normal, Z_normal, 'r-', linewidth=2, 
+               label=r'$\vec{n}$')
     
-    ax.scatter([point[0]], [point[1]], [point[2]], color='g', s=100, 
-              label=r'$P_0$')
+        ax.scatter([point[0]], [point[1]], [point[2]], color='g', s=100, 
+                  label=r'$P_0$')
     
-    ax.set_xlabel(r'$x$')
-    ax.set_ylabel(r'$y$')
-    ax.set_zlabel(r'$z$')
-    ax.set_title(r'$x - y - 3z - 3 = 0$')
-    ax.legend(fontsize=10)
+        ax.set_xlabel(r'$x$')
+        ax.set_ylabel(r'$y$')
+        ax.set_zlabel(r'$z$')
+        ax.set_title(r'$x - y - 3z - 3 = 0$')
+        ax.legend(fontsize=10)
     
     return fig
 
@@ -108,13 +107,14 @@ def create_report(canvas):
     
     y -= 50
     canvas.drawString(50, y, 'Параметрическое уравнение нормали:')
-    canvas.drawString(70, y-20, f'r(t) = ({point[0]}, {point[1]}, {point[2]}) + ')
-    canvas.drawString(70, y-40, f't·({normal[0]:.3f}, {normal[1]:.3f}, {normal[2]:.3f})')
-    
-    # Сохраняем график с LaTeX
-    fig = plot_plane_and_normal()
-    filepath = save_figure_to_temp(fig, 'plot_10.png')
-    canvas.drawImage(filepath, 50, 250, width=500, height=400)
+    # Уравнение набирается формулой; mathtext справляется с ним без запуска TeX
+    equation = (r'\vec{r}(t) = ({%g},\ {%g},\ {%g}) + t\,({%.3f},\ {%.3f},\ {%.3f})'
+                % (*point, *normal))
+    formula, = render_formulas([equation])
+    draw_formula(canvas, formula, 70, y-28)
+    
+    # Берем график из кэша или строим его заново; подписи набирает mathtext
+    draw_cached_figure(canvas, plot_plane_and_normal, (), 50, 250, 500, 400, encoding='palette')
     
     canvas.showPage()
     
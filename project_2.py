@@ -1,27 +1,29 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from sympy import symbols, diff, simplify, cos, sin
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
-import io
+from figure_cache import draw_cached_figure
+from symbolic_cache import symbolic_cache
+from parametric_curve import ParametricCurve
+from curve_sampling import sample_curve
+from sympy_kernels import compile_expression
+from figure_templates import FigureTemplate, template_figure
+
+def make_curve(a, b):
+    """Винтовая линия (a*cos(u), a*sin(u), b*u) как ParametricCurve"""
+    return ParametricCurve(
+        lambda u: (a * np.cos(u), a * np.sin(u), b * u),
+        lambda u: (-a * np.sin(u), a * np.cos(u), b),
+        lambda u: (-a * np.cos(u), -a * np.sin(u), 0),
+    )
 
 def curve_point(u, a, b):
-    """Вычисляет точку на кривой для заданного параметра u"""
-    x = a * np.cos(u)
-    y = a * np.sin(u)
-    z = b * u
-    return np.array([x, y, z])
+    """Вычисляет точку на кривой для заданного параметра u (или массива параметров)"""
+    return make_curve(a, b).points(u)
 
 def tangent_vector(u, a, b):
     """Вычисляет касательный вектор к кривой"""
-    dx = -a * np.sin(u)
-    dy = a * np.cos(u)
-    dz = b
-    norm = np.sqrt(dx**2 + dy**2 + dz**2)
-    return np.array([dx, dy, dz]) / norm
+    return make_curve(a, b).tangents(u)
 
+@symbolic_cache
 def calculate_curvature_symbolic():
     """Вычисляет кривизну кривой символьно"""
     # Определяем символьные переменные
@@ -60,37 +62,60 @@ def calculate_curvature_symbolic():
     
     return simplify(curvature)
 
+def curvature_along_curve(a, b, u):
+    """Вычисляет кривизну по символьной формуле сразу для массива параметров u"""
+    u_sym, a_sym, b_sym = symbols('u a b')
+    kernel = compile_expression(calculate_curvature_symbolic(), (u_sym, a_sym, b_sym))
+    return kernel(u, a, b)
+
+def numeric_results(a, b, n_points=4096):
+    """
+    Кривизна по формуле a/(a² + b²) и ее наименьшее и наибольшее значения
+    по символьному ядру; a и b могут быть массивами, тогда значения
+    вычисляются сразу для всех вариантов
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    kappa = curvature_along_curve(a[..., np.newaxis], b[..., np.newaxis],
+                                  np.linspace(-2*np.pi, 2*np.pi, n_points))
+    return {
+        'curvature': a / (a**2 + b**2),
+        'curvature_min': kappa.min(axis=-1),
+        'curvature_max': kappa.max(axis=-1),
+    }
+
+class HelixTemplate(FigureTemplate):
+    """Шаблон графика винтовой линии с касательными векторами"""
+
+    def setup(self, fig):
+        self.ax = fig.add_subplot(111, projection='3d')
+        self.line, = self.ax.plot([], [], [], 'b-', label='Кривая')
+        self.quiver = None
+        self.ax.set_xlabel('X')
+        self.ax.set_ylabel('Y')
+        self.ax.set_zlabel('Z')
+        self.ax.set_title('Винтовая линия с касательными векторами')
+        self.ax.legend()
+
+    def update(self, a, b):
+        curve = make_curve(a, b)
+        
+        # Адаптивная выборка вместо равномерной сетки из 1000 точек
+        x, y, z = sample_curve(curve.points, -2*np.pi, 2*np.pi)
+        self.line.set_data_3d(x, y, z)
+        self.ax.auto_scale_xyz(x, y, z, had_data=False)
+        
+        # Стрелки quiver заново строятся одним вызовом, оси остаются прежними
+        if self.quiver is not None:
+            self.quiver.remove()
+        u_samples = np.linspace(-2*np.pi, 2*np.pi, 8)
+        px, py, pz = curve.points(u_samples)
+        tx, ty, tz = curve.tangents(u_samples)
+        self.quiver = self.ax.quiver(px, py, pz, tx, ty, tz, color='r', length=1.0)
+
 def plot_3d_curve(a, b):
     """Строит трехмерную кривую с касательными векторами"""
-    fig = plt.figure(figsize=(12, 8))
-    ax = fig.add_subplot(111, projection='3d')
-    
-    # Создаем массив параметра u
-    u = np.linspace(-2*np.pi, 2*np.pi, 1000)
-    
-    # Вычисляем точки кривой
-    points = np.array([curve_point(ui, a, b) for ui in u])
-    
-    # Строим кривую
-    ax.plot(points[:, 0], points[:, 1], points[:, 2], 'b-', label='Кривая')
-    
-    # Добавляем касательные векторы
-    u_samples = np.linspace(-2*np.pi, 2*np.pi, 8)
-    for ui in u_samples:
-        point = curve_point(ui, a, b)
-        tangent = tangent_vector(ui, a, b)
-        
-        # Рисуем касательный вектор
-        ax.quiver(point[0], point[1], point[2],
-                 tangent[0], tangent[1], tangent[2],
-                 color='r', length=1.0)
-    
-    ax.set_xlabel('X')
-    ax.set_ylabel('Y')
-    ax.set_zlabel('Z')
-    ax.set_title('Винтовая линия с касательными векторами')
-    plt.legend()
-    return fig
+    return template_figure(HelixTemplate, a, b)
 
 def create_report(a, b, canvas):
     """Создает PDF отчет с решением"""
@@ -106,19 +131,18 @@ def create_report(a, b, canvas):
     canvas.drawString(50, 700, 'Касательный вектор T(u):')
     canvas.drawString(50, 680, '(-a*sin(u), a*cos(u), b) / sqrt(a² + b²)')
     
-    # Сохраняем график во временный файл
-    fig = plot_3d_curve(a, b)
-    fig.savefig('temp_plot_3d.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
-    
-    # Добавляем график из файла
-    canvas.drawImage('temp_plot_3d.png', 50, 250, width=500, height=400)
+    # Берем график из кэша или строим его заново
+    draw_cached_figure(canvas, plot_3d_curve, (a, b), 50, 250, 500, 400, encoding='palette')
     
     # Кривизна
     canvas.drawString(50, 230, 'Кривизна κ(u):')
     canvas.drawString(50, 210, f'κ = a/(a² + b²) = const')
     canvas.drawString(50, 190, 'Кривизна постоянна и зависит только от a и b')
     
+    # Численная проверка символьной формулы на плотной сетке параметра
+    kappa = curvature_along_curve(a, b, np.linspace(-2*np.pi, 2*np.pi, 100000))
+    canvas.drawString(50, 170, f'Численно (1e5 точек): min κ = {kappa.min():.4f}, max κ = {kappa.max():.4f}')
+    
     canvas.showPage()
     
     # Вторая страница - доказательство для S(2)
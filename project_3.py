@@ -1,13 +1,13 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from sympy import symbols, diff, simplify, cos, sin
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
+from reportlab_backend import draw_figure
+from curve_sampling import sample_curve
 
 def calculate_tangent_vector_explicit():
     """Вычисляет касательный вектор для явного представления кривой"""
+    # sympy нужен только символьным выкладкам, страница отчета его не загружает
+    from sympy import symbols, diff
+
     # Определяем символьные переменные
     x, y = symbols('x y')
     dy_dx = diff(y, x)
@@ -20,6 +20,8 @@ def calculate_tangent_vector_explicit():
 
 def calculate_curvature_explicit():
     """Вычисляет кривизну для явного представления кривой"""
+    from sympy import symbols, diff
+
     x, y = symbols('x y')
     dy_dx = diff(y, x)
     d2y_dx2 = diff(dy_dx, x)
@@ -31,6 +33,8 @@ def calculate_curvature_explicit():
 
 def calculate_tangent_vector_parametric():
     """Вычисляет касательный вектор для параметрического представления"""
+    from sympy import symbols, diff
+
     u, x, y = symbols('u x y')
     dx_du = diff(x, u)
     dy_du = diff(y, u)
@@ -43,6 +47,8 @@ def calculate_tangent_vector_parametric():
 
 def calculate_curvature_parametric():
     """Вычисляет кривизну для параметрического представления"""
+    from sympy import symbols, diff
+
     u, x, y = symbols('u x y')
     dx_du = diff(x, u)
     dy_du = diff(y, u)
@@ -59,8 +65,7 @@ def calculate_curvature_parametric():
 def plot_example_curve():
     """Строит пример кривой с касательными векторами"""
     # Создаем простую параболу как пример
-    x = np.linspace(-2, 2, 100)
-    y = x**2
+    x, y = sample_curve(lambda t: (t, t**2), -2, 2)
     
     fig = plt.figure(figsize=(10, 8))
     plt.plot(x, y, 'b-', label='Кривая')
@@ -83,6 +88,8 @@ def plot_example_curve():
 
 def create_report(canvas):
     """Создает PDF отчет с решением"""
+    from group_checks import summary
+
     # Заголовок
     canvas.drawString(50, 800, 'Проект 1-3')
     
@@ -102,13 +109,8 @@ def create_report(canvas):
     canvas.drawString(50, 580, 'Кривизна κ(u):')
     canvas.drawString(50, 560, 'κ(u) = (dx/du * d²y/du² - dy/du * d²x/du²) / ((dx/du)² + (dy/du)²)^(3/2)')
     
-    # Сохраняем график во временный файл
-    fig = plot_example_curve()
-    fig.savefig('temp_plot_3.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
-    
-    # Добавляем график
-    canvas.drawImage('temp_plot_3.png', 50, 150, width=500, height=400)
+    # Рисуем график векторно прямо на странице
+    draw_figure(plot_example_curve(), canvas, 50, 150, 500, 400)
     
     canvas.showPage()
     
@@ -160,6 +162,9 @@ def create_report(canvas):
     canvas.drawString(50, y, '- RS сначала отражает точку, затем поворачивает результат')
     y -= 20
     canvas.drawString(50, y, '- Эти операции дают разные результаты для общего случая')
+    
+    # Численная проверка тождеств на случайных отражениях и поворотах
+    canvas.drawString(50, y - 30, summary('project_3'))
 
 if __name__ == "__main__":
     create_report() 
\ No newline at end of file
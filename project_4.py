@@ -1,33 +1,22 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from sympy import symbols, diff, simplify, cos, sin, Matrix
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
+from figure_cache import draw_cached_figure
+from surface_mesh import revolution_surface
 
-def generate_rotation_surface(p, q, u_range, phi_range, n_points=50):
+def generate_rotation_surface(p, q, u_range, phi_range, n_points=None, dtype=np.float64):
     """
     Генерирует точки поверхности вращения
     p(u) - радиус в плоскости XY
     q(u) - высота по оси Z
+    Без n_points плотность сетки подбирается по месту под график
     """
-    u = np.linspace(u_range[0], u_range[1], n_points)
-    phi = np.linspace(0, 2*np.pi, n_points)
-    
-    # Создаем сетку параметров
-    U, PHI = np.meshgrid(u, phi)
-    
-    # Вычисляем координаты точек поверхности
-    X = p(U) * np.cos(PHI)
-    Y = p(U) * np.sin(PHI)
-    Z = q(U)
-    
-    return X, Y, Z
+    return revolution_surface(p, q, u_range, phi_range, n_points, dtype=dtype)
 
 def plot_rotation_surface(p, q, u_range, title="Поверхность вращения"):
     """Строит поверхность вращения"""
+    from surface_render import plot_shaded_surface
+
     fig = plt.figure(figsize=(12, 8))
     ax = fig.add_subplot(111, projection='3d')
     
@@ -35,7 +24,7 @@ def plot_rotation_surface(p, q, u_range, title="Поверхность вращ
     X, Y, Z = generate_rotation_surface(p, q, u_range, (0, 2*np.pi))
     
     # Строим поверхность
-    surf = ax.plot_surface(X, Y, Z, cmap='viridis', alpha=0.8)
+    surf = plot_shaded_surface(ax, X, Y, Z, cmap='viridis', alpha=0.8)
     
     # Добавляем цветовую шкалу
     fig.colorbar(surf)
@@ -78,6 +67,8 @@ def plot_cylinder_example():
 
 def create_report(canvas):
     """Создает PDF отчет с решением"""
+    from group_checks import summary
+
     # Определяем диапазон параметров
     u_range = (0, 2*np.pi)
     
@@ -90,28 +81,19 @@ def create_report(canvas):
     canvas.drawString(50, 730, '((u, φ), (p(u)cos(φ)i + p(u)sin(φ)j + q(u)k))')
     canvas.drawString(50, 710, f'где {u_range[0]} ≤ u ≤ {u_range[1]}, 0 ≤ φ ≤ 2π')
     
-    # Сохраняем график поверхности вращения
-    fig = plot_rotation_surface(lambda u: np.sin(u), lambda u: u, u_range)
-    fig.savefig('temp_plot_4a.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
-    
-    # Добавляем график
-    canvas.drawImage('temp_plot_4a.png', 50, 300, width=500, height=400)
+    # Берем график поверхности вращения из кэша или строим его заново
+    draw_cached_figure(canvas, plot_rotation_surface, (lambda u: np.sin(u), lambda u: u, u_range),
+                       50, 300, 500, 400, encoding='jpeg')
     
     # Часть 1б - Цилиндр
     canvas.drawString(50, 280, '1б. Симметричное параметрическое представление цилиндра:')
     canvas.drawString(50, 260, 'p(u) = R (константа)')
     canvas.drawString(50, 240, 'q(u) = u')
     
-    # Сохраняем график цилиндра
-    fig = plot_cylinder_example()
-    fig.savefig('temp_plot_4b.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
-    
     canvas.showPage()
     
     # Вторая страница - цилиндр
-    canvas.drawImage('temp_plot_4b.png', 50, 400, width=500, height=400)
+    draw_cached_figure(canvas, plot_cylinder_example, (), 50, 400, 500, 400, encoding='jpeg')
     
     # Доказательство для второй части
     canvas.setFont('Roboto', 12)
@@ -139,6 +121,9 @@ def create_report(canvas):
             canvas.setFont('Roboto', 12)
             canvas.drawString(50, y, line)
             y -= 20
+    
+    # Численная проверка тождеств на случайных углах
+    canvas.drawString(50, y - 10, summary('project_4'))
 
 if __name__ == "__main__":
     # Для локального тестирования
@@ -1,52 +1,33 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from sympy import symbols, diff, simplify, cos, sin, Matrix, eye, expand
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
+from figure_cache import draw_cached_figure
+from figure_templates import SurfaceTemplate, template_figure
+from surface_mesh import revolution_surface
+from symbolic_cache import symbolic_cache
+from sympy_kernels import compile_expression
 
-def generate_cone_surface(h, r, u_range, phi_range, n_points=50):
+def generate_cone_surface(h, r, u_range, phi_range, n_points=None, dtype=np.float64):
     """
     Генерирует точки конической поверхности
     h - высота конуса
     r - радиус основания
+    Без n_points плотность сетки подбирается по месту под график
     """
-    u = np.linspace(u_range[0], u_range[1], n_points)
-    phi = np.linspace(phi_range[0], phi_range[1], n_points)
-    
-    # Создаем сетку параметров
-    U, PHI = np.meshgrid(u, phi)
-    
-    # Параметрические уравнения конуса
-    X = (r * U / h) * np.cos(PHI)
-    Y = (r * U / h) * np.sin(PHI)
-    Z = U
-    
-    return X, Y, Z
+    # Конус - поверхность вращения образующей с радиусом r*u/h на высоте u
+    return revolution_surface(lambda u: r * u / h, lambda u: u, u_range, phi_range, n_points, dtype=dtype)
+
+class ConeTemplate(SurfaceTemplate):
+    """Шаблон графика конической поверхности"""
+
+    title = 'Коническая поверхность'
+
+    def surface(self, h, r):
+        return generate_cone_surface(h, r, (0, h), (0, 2*np.pi))
 
 def plot_cone(h, r):
     """Строит коническую поверхность"""
-    fig = plt.figure(figsize=(12, 8))
-    ax = fig.add_subplot(111, projection='3d')
-    
-    # Генерируем поверхность конуса
-    X, Y, Z = generate_cone_surface(h, r, (0, h), (0, 2*np.pi))
-    
-    # Строим поверхность
-    surf = ax.plot_surface(X, Y, Z, cmap='viridis', alpha=0.8)
-    
-    # Добавляем цветовую шкалу
-    fig.colorbar(surf)
-    
-    # Настраиваем вид
-    ax.set_xlabel('X')
-    ax.set_ylabel('Y')
-    ax.set_zlabel('Z')
-    ax.set_title('Коническая поверхность')
-    
-    return fig
+    # Оси, подписи и цветовая шкала строятся один раз на процесс
+    return template_figure(ConeTemplate, h, r)
 
 def calculate_An_matrix():
     """Вычисляет матрицу An для векторного произведения"""
@@ -63,6 +44,7 @@ def calculate_An_matrix():
     
     return An, n
 
+@symbolic_cache
 def calculate_rotation_matrix():
     """Вычисляет матрицу поворота Wn(θ)"""
     theta = symbols('theta')
@@ -76,7 +58,30 @@ def calculate_rotation_matrix():
     
     return expand(Wn)
 
-def create_report(canvas):
+def evaluate_rotation_matrix(n1, n2, n3, theta):
+    """
+    Вычисляет развернутую матрицу Wn(θ) численно для массивов осей и углов
+    Возвращает массив формы (3, 3) + общая форма аргументов
+    """
+    symbols_n = symbols('n1 n2 n3')
+    kernel = compile_expression(calculate_rotation_matrix(), (*symbols_n, symbols('theta')))
+    return kernel(n1, n2, n3, theta)
+
+def numeric_results(h, r):
+    """
+    Численные характеристики конуса; h и r могут быть массивами,
+    тогда значения вычисляются сразу для всех вариантов
+    """
+    h = np.asarray(h, dtype=float)
+    r = np.asarray(r, dtype=float)
+    slant = np.hypot(h, r)
+    return {
+        'slant_height': slant,
+        'lateral_area': np.pi * r * slant,
+        'volume': np.pi * r**2 * h / 3,
+    }
+
+def create_report(h, r, canvas):
     """Создает PDF отчет с решением"""
     # Заголовок
     canvas.drawString(50, 800, 'Проект 1-5')
@@ -91,15 +96,10 @@ def create_report(canvas):
     canvas.drawString(50, 680, '1б. Параметрическое представление конуса:')
     canvas.drawString(50, 660, 'p(u) = ru/h')
     canvas.drawString(50, 640, 'q(u) = u')
-    canvas.drawString(50, 620, 'где h - высота конуса, r - радиус основания')
-    
-    # Сохраняем график конуса
-    fig = plot_cone(2, 1)
-    fig.savefig('temp_plot_5.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
+    canvas.drawString(50, 620, f'где h = {h} - высота конуса, r = {r} - радиус основания')
     
-    # Добавляем график
-    canvas.drawImage('temp_plot_5.png', 50, 200, width=500, height=400)
+    # Берем график конуса из кэша или строим его заново
+    draw_cached_figure(canvas, plot_cone, (h, r), 50, 200, 500, 400, encoding='jpeg')
     
     canvas.showPage()
     
@@ -168,5 +168,5 @@ if __name__ == "__main__":
     from reportlab.lib.pagesizes import A4
     c = canvas.Canvas("report_project_5.pdf", pagesize=A4)
     c.setFont('Roboto', 12)
-    create_report(c)
+    create_report(2, 1, c)
     c.save() 
\ No newline at end of file
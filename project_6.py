@@ -1,53 +1,35 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from sympy import symbols, diff, simplify, cos, sin, Matrix, eye, expand, det
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
+from figure_cache import draw_cached_figure
+from figure_templates import SurfaceTemplate, template_figure
+from surface_mesh import revolution_surface
+from symbolic_cache import symbolic_cache
 
-def generate_torus_surface(R, r, u_range, phi_range, n_points=50):
+def generate_torus_surface(R, r, u_range, phi_range, n_points=None, dtype=np.float64):
     """
     Генерирует точки торической поверхности
     R - радиус центральной окружности
     r - радиус трубки тора
+    Без n_points плотность сетки подбирается по месту под график
     """
-    u = np.linspace(u_range[0], u_range[1], n_points)
-    phi = np.linspace(phi_range[0], phi_range[1], n_points)
-    
-    # Создаем сетку параметров
-    U, PHI = np.meshgrid(u, phi)
-    
-    # Параметрические уравнения тора
-    X = (R + r*np.cos(U)) * np.cos(PHI)
-    Y = (R + r*np.cos(U)) * np.sin(PHI)
-    Z = r * np.sin(U)
-    
-    return X, Y, Z
+    # Тор - поверхность вращения окружности радиуса r с центром на расстоянии R от оси
+    return revolution_surface(lambda u: R + r*np.cos(u), lambda u: r*np.sin(u), u_range, phi_range,
+                              n_points, dtype=dtype)
+
+class TorusTemplate(SurfaceTemplate):
+    """Шаблон графика тора"""
+
+    title = 'Тор'
+
+    def surface(self, R, r):
+        return generate_torus_surface(R, r, (0, 2*np.pi), (0, 2*np.pi))
 
 def plot_torus(R, r):
     """Строит поверхность тора"""
-    fig = plt.figure(figsize=(12, 8))
-    ax = fig.add_subplot(111, projection='3d')
-    
-    # Генерируем поверхность тора
-    X, Y, Z = generate_torus_surface(R, r, (0, 2*np.pi), (0, 2*np.pi))
-    
-    # Строим поверхность
-    surf = ax.plot_surface(X, Y, Z, cmap='viridis', alpha=0.8)
-    
-    # Добавляем цветовую шкалу
-    fig.colorbar(surf)
-    
-    # Настраиваем вид
-    ax.set_xlabel('X')
-    ax.set_ylabel('Y')
-    ax.set_zlabel('Z')
-    ax.set_title('Тор')
-    
-    return fig
+    # Оси, подписи и цветовая шкала строятся один раз на процесс
+    return template_figure(TorusTemplate, R, r)
 
+@symbolic_cache
 def calculate_rotation_matrix_determinant():
     """Вычисляет определитель матрицы поворота Wn(θ)"""
     # Определяем символьные переменные
@@ -71,8 +53,22 @@ def calculate_rotation_matrix_determinant():
     
     return simplify(determinant)
 
-def create_report(canvas):
+def numeric_results(R, r):
+    """
+    Численные характеристики тора; R и r могут быть массивами,
+    тогда значения вычисляются сразу для всех вариантов
+    """
+    R = np.asarray(R, dtype=float)
+    r = np.asarray(r, dtype=float)
+    return {
+        'area': 4 * np.pi**2 * R * r,
+        'volume': 2 * np.pi**2 * R * r**2,
+    }
+
+def create_report(R, r, canvas):
     """Создает PDF отчет с решением"""
+    from group_checks import summary
+
     # Заголовок
     canvas.drawString(50, 800, 'Проект 1-6')
     
@@ -86,15 +82,10 @@ def create_report(canvas):
     canvas.drawString(50, 680, '1б. Параметрическое представление тора:')
     canvas.drawString(50, 660, 'p(u) = R + r·cos(u)')
     canvas.drawString(50, 640, 'q(u) = r·sin(u)')
-    canvas.drawString(50, 620, 'где R - радиус центральной окружности, r - радиус трубки')
+    canvas.drawString(50, 620, f'где R = {R} - радиус центральной окружности, r = {r} - радиус трубки')
     
-    # Сохраняем график тора
-    fig = plot_torus(2, 0.5)
-    fig.savefig('temp_plot_6.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
-    
-    # Добавляем график
-    canvas.drawImage('temp_plot_6.png', 50, 200, width=500, height=400)
+    # Берем график тора из кэша или строим его заново
+    draw_cached_figure(canvas, plot_torus, (R, r), 50, 200, 500, 400, encoding='jpeg')
     
     canvas.showPage()
     
@@ -133,6 +124,8 @@ def create_report(canvas):
     canvas.drawString(50, y, 'всегда равен 1, что подтверждает сохранение')
     y -= 20
     canvas.drawString(50, y, 'ориентации пространства при повороте.')
+    y -= 30
+    canvas.drawString(50, y, summary('project_6'))
 
 if __name__ == "__main__":
     # Для локального тестирования
@@ -140,5 +133,5 @@ if __name__ == "__main__":
     from reportlab.lib.pagesizes import A4
     c = canvas.Canvas("report_project_6.pdf", pagesize=A4)
     c.setFont('Roboto', 12)
-    create_report(c)
+    create_report(2, 0.5, c)
     c.save() 
\ No newline at end of file
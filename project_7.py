@@ -1,66 +1,116 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from sympy import symbols, simplify, cos, sin, sqrt
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
+from figure_cache import draw_cached_figure
+from curve_sampling import tolerance_in_data_units
+from figure_templates import FigureTemplate, template_figure
+from quadric_intersection import cylinder, intersection_curves
+from surface_mesh import grid_points
 
-def generate_cylinder_intersection(l, h, a, b, alpha, n_points=100):
+def cylinder_intersection_point(theta, a, b, alpha):
     """
-    Генерирует точки кривой пересечения цилиндров
-    l - половина длины первого цилиндра
-    h - высота второго цилиндра
-    a - радиус первого цилиндра
-    b - радиус второго цилиндра
-    alpha - смещение второго цилиндра по оси Z
+    Вычисляет точки кривой пересечения цилиндров для массива параметров theta
+    Там, где подкоренное выражение отрицательное, координата X равна NaN
     """
-    theta = np.linspace(0, 2*np.pi, n_points)
-    
-    # Вычисляем точки кривой пересечения
-    X = np.sqrt(b**2 - (alpha + a*np.sin(theta))**2)
     Y = a * np.cos(theta)
     Z = alpha + a * np.sin(theta)
     
     # Фильтруем точки, где подкоренное выражение отрицательное
-    mask = b**2 - (alpha + a*np.sin(theta))**2 >= 0
-    X = np.where(mask, X, np.nan)
+    radicand = b**2 - Z**2
+    X = np.sqrt(np.where(radicand >= 0, radicand, np.nan))
     
     return X, Y, Z
 
+def generate_cylinder_intersection(l, h, a, b, alpha):
+    """
+    Генерирует точки кривой пересечения цилиндров: все ветви одной ломаной
+    с разрывами NaN между ними
+    l - половина длины первого цилиндра
+    h - высота второго цилиндра
+    a - радиус первого цилиндра
+    b - радиус второго цилиндра
+    alpha - смещение второго цилиндра по оси Z
+    """
+    return branch_polyline(intersection_branches(l, h, a, b, alpha))
+
+def cylinder_quadrics(a, b, alpha):
+    """
+    Матрицы квадрик цилиндров C₁: x² + z² = b² и C₂: y² + (z-α)² = a²
+    Параметры могут быть массивами одной формы
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    center = np.stack([np.zeros_like(alpha), np.zeros_like(alpha), alpha], axis=-1)
+    return cylinder((0, 1, 0), b), cylinder((1, 0, 0), a, center)
+
+def cylinder_bounds(l, h, b):
+    """
+    Параллелепипед, в котором лежат цилиндры в своих пределах -l ≤ y ≤ l, 0 ≤ x ≤ h:
+    границы (..., 3) для параметров-чисел или массивов одной формы
+    """
+    l, h, b = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (l, h, b)))
+    lower = np.stack([np.zeros_like(l), -l, -1.01*b], axis=-1)
+    upper = np.stack([h, l, 1.01*b], axis=-1)
+    return lower, upper
+
+def intersection_branches(l, h, a, b, alpha, placement=(500, 400), dpi=300):
+    """
+    Ветви кривой пересечения цилиндров в их пределах -l ≤ y ≤ l, 0 ≤ x ≤ h
+    Ломаные отклоняются от кривой не больше чем на пиксель при разрешении dpi,
+    если график займет на странице место placement (в пунктах)
+    """
+    lower, upper = cylinder_bounds(l, h, b)
+    tolerance = tolerance_in_data_units(72 / dpi, np.stack([lower, upper], axis=1), placement)
+    return intersection_curves(*cylinder_quadrics(a, b, alpha), lower, upper,
+                               tolerance=tolerance, spacing=8*tolerance)
+
+def branch_polyline(branches):
+    """Ветви одной ломаной (X, Y, Z) с разрывами NaN между ними, как их рисует plot"""
+    gap = np.full((1, 3), np.nan)
+    points = np.concatenate([part for branch in branches for part in (branch, gap)][:-1] or [gap])
+    return points.T
+
+class IntersectionTemplate(FigureTemplate):
+    """Шаблон графика кривой пересечения с полупрозрачными цилиндрами"""
+
+    def setup(self, fig):
+        self.ax = fig.add_subplot(111, projection='3d')
+        self.line, = self.ax.plot([], [], [], 'b-', label='Кривая пересечения')
+        self.cylinders = []
+        self.ax.set_xlabel('X')
+        self.ax.set_ylabel('Y')
+        self.ax.set_zlabel('Z')
+        self.ax.set_title('Пересечение цилиндров')
+
+    def update(self, l, h, a, b, alpha):
+        # Все ветви кривой пересечения, прослеженные без разрывов у точек ветвления
+        X, Y, Z = branch_polyline(intersection_branches(l, h, a, b, alpha))
+        self.line.set_data_3d(X, Y, Z)
+        self.ax.auto_scale_xyz(X, Y, Z, had_data=False)
+        
+        # Контуры цилиндров для наглядности: при новых параметрах меняются только их сетки
+        # Вдоль оси цилиндры прямые, и там хватает двух точек; по окружности
+        # точек столько, чтобы хорды не отличались от нее на странице
+        extent = np.sqrt((2*l)**2 + 2*(2*max(a, b) + abs(alpha))**2)
+        u = np.linspace(0, 2*np.pi, grid_points(max(a, b), 2*np.pi, extent))
+        v = np.linspace(-l, l, grid_points(0, 2*l, extent))
+        U, V = np.meshgrid(u, v)
+        surfaces = [
+            # Первый цилиндр
+            (b * np.cos(U), V, b * np.sin(U), 'r'),
+            # Второй цилиндр
+            (V, a * np.cos(U), alpha + a * np.sin(U), 'g'),
+        ]
+        if not self.cylinders:
+            from surface_render import plot_shaded_surface
+            self.cylinders = [plot_shaded_surface(self.ax, X, Y, Z, color=color, alpha=0.1)
+                              for X, Y, Z, color in surfaces]
+        else:
+            for cylinder, (X, Y, Z, _) in zip(self.cylinders, surfaces):
+                cylinder.set_data(X, Y, Z)
+                self.ax.auto_scale_xyz(X, Y, Z, had_data=True)
+
 def plot_intersection_curve(l, h, a, b, alpha):
     """Строит кривую пересечения цилиндров"""
-    fig = plt.figure(figsize=(12, 8))
-    ax = fig.add_subplot(111, projection='3d')
-    
-    # Генерируем и строим кривую пересечения
-    X, Y, Z = generate_cylinder_intersection(l, h, a, b, alpha)
-    ax.plot(X, Y, Z, 'b-', label='Кривая пересечения')
-    
-    # Добавляем контуры цилиндров для наглядности
-    u = np.linspace(0, 2*np.pi, 100)
-    v = np.linspace(-l, l, 100)
-    U, V = np.meshgrid(u, v)
-    
-    # Первый цилиндр
-    X1 = b * np.cos(U)
-    Y1 = V
-    Z1 = b * np.sin(U)
-    ax.plot_surface(X1, Y1, Z1, alpha=0.1, color='r')
-    
-    # Второй цилиндр
-    X2 = V
-    Y2 = a * np.cos(U)
-    Z2 = alpha + a * np.sin(U)
-    ax.plot_surface(X2, Y2, Z2, alpha=0.1, color='g')
-    
-    ax.set_xlabel('X')
-    ax.set_ylabel('Y')
-    ax.set_zlabel('Z')
-    ax.set_title('Пересечение цилиндров')
-    
-    return fig
+    return template_figure(IntersectionTemplate, l, h, a, b, alpha)
 
 def verify_intersection_curve():
     """Проверяет формулу кривой пересечения"""
@@ -100,7 +150,32 @@ def prove_nonlinear_projection():
     
     return T_r
 
-def create_report(canvas):
+def numeric_results(l, h, a, b, alpha, n_points=4096):
+    """
+    Численные характеристики кривой пересечения: доля параметров θ, при которых
+    кривая существует, число ветвей и их длина в пределах цилиндров -l ≤ y ≤ l,
+    0 ≤ x ≤ h, то есть у той же части кривой, что на графике. Параметры
+    могут быть массивами одной формы, тогда значения вычисляются сразу для
+    всех вариантов, а ветви всех вариантов прослеживаются одним пакетом
+    """
+    l, h, a, b, alpha = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (l, h, a, b, alpha)))
+    theta = np.linspace(0, 2*np.pi, n_points)
+    X, _, _ = cylinder_intersection_point(theta, a[..., np.newaxis], b[..., np.newaxis], alpha[..., np.newaxis])
+    
+    # Ветви ищутся в тех же пределах, в которых кривая обрезана на графике
+    lower, upper = cylinder_bounds(l, h, b)
+    branches = intersection_curves(*cylinder_quadrics(a, b, alpha), lower, upper)
+    if a.ndim == 0:
+        branches = [branches]
+    lengths = [sum(np.linalg.norm(np.diff(branch, axis=0), axis=1).sum() for branch in config)
+               for config in branches]
+    return {
+        'defined_fraction': np.mean(np.isfinite(X), axis=-1),
+        'branch_count': np.array([len(config) for config in branches]).reshape(a.shape),
+        'curve_length': np.array(lengths, dtype=float).reshape(a.shape),
+    }
+
+def create_report(l, h, a, b, alpha, canvas):
     """Создает PDF отчет с решением"""
     # Заголовок
     canvas.drawString(50, 800, 'Проект 1-7')
@@ -113,19 +188,11 @@ def create_report(canvas):
     # Параметрическое представление кривой пересечения
     canvas.drawString(50, 700, 'Кривая пересечения:')
     canvas.drawString(50, 680, 'r(θ) = ((b² - (α + a·sin θ)²)^(1/2), a·cos θ, α + a·sin θ)')
-    canvas.drawString(50, 660, '0 ≤ θ < 2π')
-    
-    # Сохраняем график пересечения с конкретными параметрами
-    l, h = 2, 3  # Длины цилиндров
-    a, b = 1, 1.5  # Радиусы цилиндров
-    alpha = 0.5  # Смещение второго цилиндра
-    
-    fig = plot_intersection_curve(l, h, a, b, alpha)
-    fig.savefig('temp_plot_7.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
+    canvas.drawString(50, 660, f'0 ≤ θ < 2π, где l = {l}, h = {h}, a = {a}, b = {b}, α = {alpha}')
     
-    # Добавляем график
-    canvas.drawImage('temp_plot_7.png', 50, 250, width=500, height=400)
+    # Берем график из кэша или строим его заново
+    draw_cached_figure(canvas, plot_intersection_curve, (l, h, a, b, alpha),
+                       50, 250, 500, 400, encoding='palette')
     
     canvas.showPage()
     
@@ -170,5 +237,6 @@ if __name__ == "__main__":
     from reportlab.lib.pagesizes import A4
     c = canvas.Canvas("report_project_7.pdf", pagesize=A4)
     c.setFont('Roboto', 12)
-    create_report(c)
+    # Длины цилиндров l, h, радиусы a, b и смещение второго цилиндра α
+    create_report(2, 3, 1, 1.5, 0.5, c)
     c.save() 
\ No newline at end of file
@@ -1,12 +1,14 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from sympy import symbols, simplify, cos, sin, sqrt, Matrix, eye, expand, solve
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
+from figure_cache import draw_cached_figure
+from symbolic_cache import symbolic_cache
+from sympy_kernels import compile_expression
+from project_7 import cylinder_quadrics, generate_cylinder_intersection
+from quadric_intersection import intersection_tangent
+from rotations import matrix_axis_angle, rotation_matrices, unit_axes
 
+@symbolic_cache
 def calculate_tangent_vector_at_zero():
     """Вычисляет касательный вектор в точке θ = 0"""
     # Определяем символьные переменные
@@ -23,8 +25,8 @@ def calculate_tangent_vector_at_zero():
     
     return simplify(tangent)
 
-def calculate_eigenvalue_and_vector():
-    """Вычисляет собственное значение и вектор для матрицы поворота"""
+def eigenvector_residual():
+    """Строит невязку Wn(θ)n - n без упрощения"""
     # Определяем символьные переменные
     theta = symbols('theta')
     n1, n2, n3 = symbols('n1 n2 n3')
@@ -43,9 +45,40 @@ def calculate_eigenvalue_and_vector():
     
     # Вектор n является собственным вектором с собственным значением 1
     n = Matrix([n1, n2, n3])
-    result = Wn * n - n  # Должно быть равно 0
-    
-    return simplify(result)
+    return Wn * n - n  # Должно быть равно 0
+
+@symbolic_cache
+def calculate_eigenvalue_and_vector():
+    """Вычисляет собственное значение и вектор для матрицы поворота"""
+    return simplify(eigenvector_residual())
+
+def verify_eigenvector_numeric(n_axes=1000, n_angles=1000, seed=0):
+    """
+    Численно проверяет Wn(θ)n = n на сетке случайных осей и углов
+    Возвращает максимальную по модулю компоненту невязки
+    """
+    rng = np.random.default_rng(seed)
+    axes = rng.normal(size=(3, n_axes))
+    axes /= np.linalg.norm(axes, axis=0)
+    theta = np.linspace(0, 2*np.pi, n_angles)
+    
+    kernel = compile_expression(eigenvector_residual(), symbols('n1 n2 n3 theta'))
+    residual = kernel(axes[0][:, None], axes[1][:, None], axes[2][:, None], theta[None, :])
+    return np.abs(residual).max()
+
+def verify_axis_extraction(n_samples=100000, seed=0):
+    """
+    Численно проверяет, что ось n и угол θ восстанавливаются по матрицам Wn(θ):
+    ось - собственный вектор с собственным значением 1. Углы берутся из (0, π),
+    где пара (n, θ) определяется матрицей однозначно
+    Возвращает наибольшее отклонение оси и угла
+    """
+    rng = np.random.default_rng(seed)
+    axes = unit_axes(rng.normal(size=(n_samples, 3)))
+    theta = rng.uniform(0, np.pi, n_samples)
+    
+    found_axes, found_theta = matrix_axis_angle(rotation_matrices(axes, theta))
+    return max(np.abs(found_axes - axes).max(), np.abs(found_theta - theta).max())
 
 def plot_cylinder_intersection_with_tangent():
     """Строит пересечение цилиндров с касательным вектором в точке θ = 0"""
@@ -57,13 +90,8 @@ def plot_cylinder_intersection_with_tangent():
     a, b = 1, 1.5
     alpha = 0.5
     
-    # Генерируем точки кривой пересечения
-    theta = np.linspace(0, 2*np.pi, 100)
-    X = np.sqrt(b**2 - (alpha + a*np.sin(theta))**2)
-    Y = a * np.cos(theta)
-    Z = alpha + a * np.sin(theta)
-    
-    # Строим кривую пересечения
+    # Строим кривую пересечения: все ее ветви в пределах цилиндров
+    X, Y, Z = generate_cylinder_intersection(l, h, a, b, alpha)
     ax.plot(X, Y, Z, 'b-', label='Кивая пересечения')
     
     # Добавляем касательный вектор в точке θ = 0
@@ -71,14 +99,11 @@ def plot_cylinder_intersection_with_tangent():
     y0 = a
     z0 = alpha
     
-    # Вычисляем компоненты касательного вектора
-    tx = -a * alpha / b
-    ty = 0
-    tz = a * np.sqrt(b**2 - alpha**2) / b
-    norm = np.sqrt(tx**2 + ty**2 + tz**2)
+    # Касательная ∇F₁ × ∇F₂ совпадает по направлению с T(0) = 1/ab · (-aα, 0, a(b² - α²)^(1/2))
+    tx, ty, tz = intersection_tangent(*cylinder_quadrics(a, b, alpha), (x0, y0, z0))
     
     # Рисуем касательный вектор
-    ax.quiver(x0, y0, z0, tx/norm, ty/norm, tz/norm,
+    ax.quiver(x0, y0, z0, tx, ty, tz,
              color='r', length=0.5, label='Касательный вектор')
     
     ax.set_xlabel('X')
@@ -106,13 +131,9 @@ def create_report(canvas):
     canvas.drawString(70, 690, 'b - радиус первого цилиндра')
     canvas.drawString(70, 670, 'α - смещение второго цилиндра')
     
-    # Сохраняем график
-    fig = plot_cylinder_intersection_with_tangent()
-    fig.savefig('temp_plot_8.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
-    
-    # Добавляем график
-    canvas.drawImage('temp_plot_8.png', 50, 250, width=500, height=400)
+    # Берем график из кэша или строим его заново
+    draw_cached_figure(canvas, plot_cylinder_intersection_with_tangent, (), 50, 250, 500, 400,
+                       encoding='palette')
     
     canvas.showPage()
     
@@ -152,6 +173,13 @@ def create_report(canvas):
         else:
             canvas.drawString(50, y, line)
             y -= 20
+    
+    # Численная проверка на плотной сетке осей и углов
+    residual = verify_eigenvector_numeric()
+    y -= 10
+    canvas.drawString(50, y, f'Численно (1e6 пар n, θ): max|Wn·n - n| = {residual:.1e}')
+    y -= 20
+    canvas.drawString(50, y, f'Ось и угол по матрицам Wn(θ) (1e5 пар): отклонение {verify_axis_extraction():.1e}')
 
 if __name__ == "__main__":
     # Для локального тестирования
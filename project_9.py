@@ -1,11 +1,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from sympy import symbols, solve, Matrix, simplify, cos, sin
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
+from figure_cache import draw_cached_figure
+from surface_mesh import grid_points
 
 def find_normal_line():
     """Находит параметрическое уравнение нормали к плоскости"""
@@ -27,9 +24,10 @@ def plot_plane_and_normal():
     fig = plt.figure(figsize=(12, 8))
     ax = fig.add_subplot(111, projection='3d')
     
-    # Создаем сетку точек для плоскости
-    x = np.linspace(-3, 3, 100)
-    y = np.linspace(-3, 3, 100)
+    # Создаем сетку точек для плоскости; плоскость не искривлена,
+    # поэтому по каждому направлению хватает двух точек
+    x = np.linspace(-3, 3, grid_points(0, 6, extent=6))
+    y = np.linspace(-3, 3, grid_points(0, 6, extent=6))
     X, Y = np.meshgrid(x, y)
     # Из уравнения плоскости 2x - y + z + 2 = 0
     Z = -(2*X - Y + 2)
@@ -80,6 +78,8 @@ def prove_isomorphism():
 
 def create_report(canvas):
     """Создает PDF отчет с решением"""
+    from group_checks import summary
+
     # Заголовок
     canvas.drawString(50, 800, 'Проект 1-9')
     
@@ -97,13 +97,8 @@ def create_report(canvas):
     canvas.drawString(70, 680, f'r(t) = ({point[0]}, {point[1]}, {point[2]}) + ')
     canvas.drawString(70, 660, f't·({normal[0]:.3f}, {normal[1]:.3f}, {normal[2]:.3f})')
     
-    # Сохраняем график
-    fig = plot_plane_and_normal()
-    fig.savefig('temp_plot_9.png', format='png', bbox_inches='tight', dpi=300)
-    plt.close(fig)
-    
-    # Добавляем график
-    canvas.drawImage('temp_plot_9.png', 50, 250, width=500, height=400)
+    # Берем график из кэша или строим его заново
+    draw_cached_figure(canvas, plot_plane_and_normal, (), 50, 250, 500, 400, encoding='palette')
     
     canvas.showPage()
     
@@ -143,6 +138,9 @@ def create_report(canvas):
         else:
             canvas.drawString(50, y, line)
             y -= 20
+    
+    # Численная проверка тождеств на случайных осях и углах
+    canvas.drawString(50, y - 10, summary('project_9'))
 
 if __name__ == "__main__":
     # Для локального тестирования
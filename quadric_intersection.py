@@ -0,0 +1,307 @@
+import numpy as np
+from tracing import traced
+
+# Итерации метода Ньютона при проекции затравок на кривую и при коррекции шага
+SEED_ITERATIONS = 8
+CORRECTOR_ITERATIONS = 4
+# Наибольший поворот касательной за один шаг, радианы
+MAX_TURN = 0.3
+# Наибольшее число ветвей, которые ищутся у одной пары квадрик
+MAX_BRANCHES = 32
+
+def quadric(A, b=(0, 0, 0), c=0.0):
+    """
+    Симметричная матрица 4×4 квадрики pᵀAp + 2bᵀp + c = 0
+    Аргументы могут быть массивами с общими ведущими осями, тогда
+    получается набор матриц формы (..., 4, 4)
+    """
+    A = np.asarray(A, dtype=float)
+    b = np.asarray(b, dtype=float)
+    c = np.asarray(c, dtype=float)
+    shape = np.broadcast_shapes(A.shape[:-2], b.shape[:-1], c.shape)
+    Q = np.zeros(shape + (4, 4))
+    Q[..., :3, :3] = (A + np.swapaxes(A, -1, -2)) / 2
+    Q[..., :3, 3] = b
+    Q[..., 3, :3] = b
+    Q[..., 3, 3] = c
+    return Q
+
+def cylinder(axis, radius, center=(0, 0, 0)):
+    """
+    Круговой цилиндр радиуса radius, ось которого проходит через center
+    в направлении axis: |p - c|² - ((p - c)·e)² = r²
+    """
+    e = np.asarray(axis, dtype=float)
+    e = e / np.linalg.norm(e, axis=-1, keepdims=True)
+    center = np.asarray(center, dtype=float)
+    A = np.eye(3) - e[..., :, np.newaxis] * e[..., np.newaxis, :]
+    Ac = np.einsum('...ij,...j->...i', A, center)
+    return quadric(A, -Ac, np.einsum('...i,...i->...', center, Ac) - np.asarray(radius, dtype=float)**2)
+
+def _pair(Q1, Q2):
+    """
+    Пары квадрик всех конфигураций в виде матриц (B, 4, 8): умножение
+    однородной точки на такую матрицу дает сразу Q1·p и Q2·p
+    """
+    Q = np.stack([Q1, Q2], axis=1)
+    return np.ascontiguousarray(Q.transpose(0, 2, 1, 3).reshape(len(Q), 4, 8))
+
+def _residual(pairs, p):
+    """
+    Значения обеих квадрик и их градиенты в точках p формы (B, S, 3)
+    Возвращает F формы (B, S, 2) и J формы (B, S, 2, 3)
+    """
+    QP = (np.matmul(p, pairs[:, :3]) + pairs[:, 3:]).reshape(p.shape[:-1] + (2, 4))
+    F = np.einsum('...j,...ij->...i', p, QP[..., :3]) + QP[..., 3]
+    return F, 2 * QP[..., :3]
+
+def _project(pairs, p, iterations):
+    """
+    Проекция точек на кривую пересечения методом Ньютона: на каждой итерации
+    берется наименьшая по длине поправка, обнуляющая линейную часть обеих квадрик
+    Возвращает точки и оценку расстояния от них до каждой из поверхностей
+
+    Массивы малых матриц NumPy обрабатывает медленно, поэтому система 2×2
+    решается явными формулами над отдельными компонентами
+    """
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        for iteration in range(iterations + 1):
+            QP = np.matmul(p, pairs[:, :3]) + pairs[:, 3:]
+            x, y, z = p[..., 0], p[..., 1], p[..., 2]
+            a0, a1, a2, a3, b0, b1, b2, b3 = (QP[..., k] for k in range(8))
+            # Значения квадрик и половины их градиентов (a0, a1, a2), (b0, b1, b2)
+            f1 = x * a0 + y * a1 + z * a2 + a3
+            f2 = x * b0 + y * b1 + z * b2 + b3
+            g11 = a0 * a0 + a1 * a1 + a2 * a2
+            g22 = b0 * b0 + b1 * b1 + b2 * b2
+            if iteration == iterations:
+                break
+            g12 = a0 * b0 + a1 * b1 + a2 * b2
+            det = 2 * (g11 * g22 - g12 * g12)
+            l1 = (g22 * f1 - g12 * f2) / det
+            l2 = (g11 * f2 - g12 * f1) / det
+            p = np.stack([x - l1 * a0 - l2 * b0, y - l1 * a1 - l2 * b1, z - l1 * a2 - l2 * b2], axis=-1)
+        distance = np.fmax(np.abs(f1) / np.sqrt(g11), np.abs(f2) / np.sqrt(g22)) / 2
+    return p, np.where(np.isfinite(distance), distance, np.inf)
+
+def _tangent(pairs, p):
+    """
+    Единичная касательная ∇F₁ × ∇F₂ в точках p; в особых точках, где
+    градиенты параллельны и касательная не определена, - NaN
+    """
+    _, J = _residual(pairs, p)
+    t = np.cross(J[..., 0, :], J[..., 1, :])
+    norm = np.linalg.norm(t, axis=-1, keepdims=True)
+    scale = np.linalg.norm(J[..., 0, :], axis=-1, keepdims=True) * np.linalg.norm(J[..., 1, :], axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(norm > 1e-9 * scale, t / norm, np.nan)
+
+def intersection_tangent(Q1, Q2, points):
+    """Единичные касательные кривой пересечения квадрик Q1, Q2 в точках points (..., 3)"""
+    points = np.asarray(points, dtype=float)
+    pairs = _pair(np.asarray(Q1, dtype=float)[np.newaxis], np.asarray(Q2, dtype=float)[np.newaxis])
+    return _tangent(pairs, points.reshape(1, -1, 3)).reshape(points.shape)
+
+def _inside(p, lower, upper):
+    return np.all((p >= lower) & (p <= upper), axis=-1)
+
+def _segment_distance(points, p, q):
+    """Расстояния от точек (k, S, 3) до отрезков [p, q] формы (k, 3)"""
+    pq = (q - p)[:, np.newaxis]
+    pp = points - p[:, np.newaxis]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.clip(np.sum(pp * pq, axis=-1) / np.sum(pq * pq, axis=-1), 0.0, 1.0)
+    t = np.where(np.isfinite(t), t, 0.0)
+    return np.linalg.norm(pp - t[..., np.newaxis] * pq, axis=-1)
+
+def _seeds(pairs, lower, upper, n, tolerance, cell):
+    """
+    Затравки ветвей: узлы сетки n×n×n в параллелепипеде проецируются на кривую,
+    точки из одной ячейки размера cell сливаются в одну
+    Возвращает массив (B, S, 3), недостающие затравки заполнены NaN
+    """
+    g = (np.arange(n) + 0.5) / n
+    grid = np.stack(np.meshgrid(g, g, g, indexing='ij'), axis=-1).reshape(-1, 3)
+    p = lower[:, np.newaxis] + (upper - lower)[:, np.newaxis] * grid
+    p, distance = _project(pairs, p, SEED_ITERATIONS)
+    good = (distance < 1e-2 * tolerance[:, np.newaxis]) & _inside(p, lower[:, np.newaxis], upper[:, np.newaxis])
+
+    config, index = np.nonzero(good)
+    points = p[config, index]
+    cells = np.floor((points - lower[config]) / cell[config, np.newaxis]).astype(np.int64)
+    size = cells.max(axis=0, initial=0) + 1
+    keys = ((config * size[0] + cells[:, 0]) * size[1] + cells[:, 1]) * size[2] + cells[:, 2]
+    _, first = np.unique(keys, return_index=True)
+    config, points = config[first], points[first]
+
+    counts = np.bincount(config, minlength=len(pairs))
+    seeds = np.full((len(pairs), max(counts.max(initial=0), 1), 3), np.nan)
+    position = np.arange(len(config)) - np.repeat(np.cumsum(counts) - counts, counts)
+    seeds[config, position] = points
+    return seeds
+
+def _trace(pairs, start, direction, lower, upper, tolerance, h_max, seeds, visited, max_steps):
+    """
+    Продолжение по параметру от точек start в направлении direction, одновременно
+    для всех конфигураций (у неактивных start - NaN). Предиктор - шаг по касательной,
+    корректор - проекция Ньютоном; шаг выбирается по кривизне так, чтобы хорда
+    отходила от кривой не дальше tolerance. Трассировка конфигурации кончается,
+    когда кривая замкнулась, вышла из параллелепипеда или пришла в особую точку
+    Затравки, мимо которых прошла ветвь, отмечаются в visited
+    Возвращает списки точек по конфигурациям и признак замкнутости
+    """
+    count = len(start)
+    p = start.copy()
+    t = direction.copy()
+    h = h_max / 4
+    h_min = 1e-3 * tolerance
+    active = np.isfinite(start[:, 0]) & np.isfinite(direction[:, 0])
+    closed = np.zeros(count, dtype=bool)
+    length = np.zeros(count)
+    records = [(np.flatnonzero(active), start[active])]
+    cos_turn = np.cos(MAX_TURN)
+
+    for _ in range(max_steps):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+        pi, ti, hi = p[idx], t[idx], h[idx]
+        q, distance = _project(pairs[idx], (pi + hi[:, np.newaxis] * ti)[:, np.newaxis], CORRECTOR_ITERATIONS)
+        q, distance = q[:, 0], distance[:, 0]
+        tq = _tangent(pairs[idx], q[:, np.newaxis])[:, 0]
+        tq *= np.where(np.sum(tq * ti, axis=-1) < 0, -1.0, 1.0)[:, np.newaxis]
+        chord = np.linalg.norm(q - pi, axis=-1)
+        with np.errstate(invalid='ignore'):
+            ok = ((distance < 1e-2 * tolerance[idx]) & (np.sum(tq * ti, axis=-1) > cos_turn)
+                  & (chord > 0.5 * hi) & (chord < 1.5 * hi))
+
+        # Неудачный шаг повторяется с половинной длиной; если шаг стал слишком
+        # мелким, кривая пришла в особую точку и трассировка обрывается
+        rejected = idx[~ok]
+        h[rejected] *= 0.5
+        active[rejected[h[rejected] < h_min[rejected]]] = False
+
+        idx, q, tq, chord = idx[ok], q[ok], tq[ok], chord[ok]
+        if len(idx) == 0:
+            continue
+        pi, ti = p[idx], t[idx]
+
+        # Кривая замкнулась, если отрезок шага прошел через начальную точку
+        done = (length[idx] > 2 * chord) & (_segment_distance(start[idx, np.newaxis], pi, q)[:, 0] < 4 * tolerance[idx])
+        q[done] = start[idx[done]]
+        closed[idx[done]] = True
+
+        # Шаг за границу параллелепипеда обрезается по ней
+        outside = ~_inside(q, lower[idx], upper[idx])
+        if outside.any():
+            a, b = pi[outside], q[outside]
+            lo, hi_ = lower[idx[outside]], upper[idx[outside]]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fraction = np.where(b > hi_, (hi_ - a) / (b - a), np.where(b < lo, (lo - a) / (b - a), 1.0))
+            q[outside] = a + np.min(fraction, axis=-1, keepdims=True) * (b - a)
+            done |= outside
+
+        visited[idx] |= _segment_distance(seeds[idx], pi, q) < 4 * tolerance[idx, np.newaxis]
+        active[idx[done]] = False
+        records.append((idx, q))
+
+        # Хорда шага h отходит от кривой кривизны κ на h²κ/8
+        with np.errstate(divide='ignore', invalid='ignore'):
+            curvature = np.linalg.norm(tq - ti, axis=-1) / chord
+            step = 0.9 * np.sqrt(8 * tolerance[idx] / curvature)
+        h[idx] = np.fmin(np.minimum(2 * h[idx], h_max[idx]), step)
+        length[idx] += chord
+        p[idx] = q
+        t[idx] = tq
+
+    index = np.concatenate([r[0] for r in records])
+    points = np.concatenate([r[1] for r in records])
+    order = np.argsort(index, kind='stable')
+    counts = np.bincount(index, minlength=count)
+    return np.split(points[order], np.cumsum(counts)[:-1]), closed
+
+def _resample(path, spacing):
+    """Равномерная по длине дуги выборка ломаной с шагом не больше spacing"""
+    s = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(path, axis=0), axis=-1))])
+    n = max(int(np.ceil(s[-1] / spacing)), 1)
+    s_new = np.linspace(0, s[-1], n + 1)
+    return np.stack([np.interp(s_new, s, path[:, k]) for k in range(3)], axis=-1)
+
+@traced(category='numpy')
+def intersection_curves(Q1, Q2, lower, upper, tolerance=None, spacing=None, seeds=6, max_steps=4096):
+    """
+    Ветви кривой пересечения квадрик Q1 и Q2 (симметричные матрицы 4×4)
+    внутри параллелепипеда lower ≤ p ≤ upper
+
+    Затравки из узлов сетки seeds×seeds×seeds проецируются на кривую, от каждой
+    еще не пройденной затравки ветвь прослеживается в обе стороны методом
+    продолжения с шагом по кривизне; tolerance - допустимое отклонение хорд
+    от кривой (по умолчанию 0.001 диагонали параллелепипеда). Готовые ветви
+    переразбиваются равномерно по длине дуги с шагом spacing (по умолчанию
+    1/256 диагонали) и еще раз проецируются на кривую
+
+    Матрицы и границы могут быть наборами с общими ведущими осями - тогда все
+    конфигурации прослеживаются одновременно. Для одной пары возвращается список
+    ветвей - массивов (n, 3), для набора - такие списки по конфигурациям
+    в порядке их следования. У замкнутой ветви последняя точка совпадает с первой
+    """
+    Q1 = np.asarray(Q1, dtype=float)
+    Q2 = np.asarray(Q2, dtype=float)
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    shape = np.broadcast_shapes(Q1.shape[:-2], Q2.shape[:-2], lower.shape[:-1], upper.shape[:-1])
+    pairs = _pair(np.broadcast_to(Q1, shape + (4, 4)).reshape(-1, 4, 4),
+                  np.broadcast_to(Q2, shape + (4, 4)).reshape(-1, 4, 4))
+    count = len(pairs)
+    lower = np.broadcast_to(lower, shape + (3,)).reshape(count, 3)
+    upper = np.broadcast_to(upper, shape + (3,)).reshape(count, 3)
+    diagonal = np.linalg.norm(upper - lower, axis=-1)
+    tolerance = np.broadcast_to(1e-3 * diagonal if tolerance is None else tolerance, (count,)).astype(float)
+    spacing = np.broadcast_to(diagonal / 256 if spacing is None else spacing, (count,)).astype(float)
+    h_max = diagonal / 32
+
+    points = _seeds(pairs, lower, upper, seeds, tolerance, diagonal / 16)
+    visited = np.isnan(points[..., 0])
+    rows = np.arange(count)
+    branches = [[] for _ in range(count)]
+    for _ in range(MAX_BRANCHES):
+        free = ~visited
+        has = free.any(axis=1)
+        if not has.any():
+            break
+        first = np.argmax(free, axis=1)
+        start = np.where(has[:, np.newaxis], points[rows, first], np.nan)
+        visited[rows[has], first[has]] = True
+
+        direction = _tangent(pairs, start[:, np.newaxis])[:, 0]
+        forward, closed = _trace(pairs, start, direction, lower, upper, tolerance, h_max,
+                                 points, visited, max_steps)
+        start[closed] = np.nan
+        backward, _ = _trace(pairs, start, -direction, lower, upper, tolerance, h_max,
+                             points, visited, max_steps)
+        for i in np.flatnonzero(has):
+            path = forward[i] if closed[i] else np.concatenate([backward[i][::-1], forward[i][1:]])
+            if len(path) >= 2:
+                branches[i].append(_resample(path, spacing[i]))
+
+    # Переразбитые точки лежат на хордах; все они уточняются одной проекцией,
+    # для чего собираются в общий массив (B, M, 3), дополненный NaN. Рядом
+    # с особыми точками проекция плохо обусловлена, и там, где она уводит
+    # точку дальше допуска, точка остается на хорде
+    sizes = np.array([sum(len(branch) for branch in config) for config in branches])
+    if sizes.sum():
+        flat = np.concatenate([branch for config in branches for branch in config])
+        config = np.repeat(rows, sizes)
+        position = np.arange(len(flat)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        padded = np.full((count, sizes.max(), 3), np.nan)
+        padded[config, position] = flat
+        projected = _project(pairs, padded, 1)[0][config, position]
+        moved = np.linalg.norm(projected - flat, axis=-1) <= 2 * tolerance[config]
+        flat[moved] = projected[moved]
+        offset = 0
+        for config in branches:
+            for k, branch in enumerate(config):
+                config[k] = flat[offset:offset + len(branch)]
+                offset += len(branch)
+
+    return branches[0] if shape == () else branches
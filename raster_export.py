@@ -0,0 +1,163 @@
+import hashlib
+import io
+import struct
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from reportlab.pdfbase import pdfdoc
+from PIL import Image
+from tracing import traced
+
+# Способы кодирования изображения в PDF:
+#   flate   - PNG (Flate с PNG-предикторами), без потерь
+#   jpeg    - DCT с потерями, подходит для затененных поверхностей
+#   palette - PNG с палитрой до 256 цветов, подходит для линейной графики
+ENCODINGS = ('flate', 'jpeg', 'palette')
+EXTENSIONS = {'flate': '.png', 'jpeg': '.jpg', 'palette': '.png'}
+
+@traced(category='matplotlib')
+def render_figure_pixels(fig, width, height, dpi=300):
+    """
+    Рендерит фигуру ровно под место на странице одним проходом Agg
+    width и height - размер места в пунктах; возвращает RGB массив
+    размером width*dpi/72 x height*dpi/72 пикселей на белом фоне
+    """
+    try:
+        fig.set_size_inches(width / 72, height / 72)
+        fig.set_dpi(dpi)
+        agg = FigureCanvasAgg(fig)
+        agg.draw()
+        rgba = np.asarray(agg.buffer_rgba(), dtype=np.float32)
+    finally:
+        plt.close(fig)
+
+    # Накладываем полупрозрачные пиксели на белую страницу
+    alpha = rgba[..., 3:] / 255
+    rgb = rgba[..., :3] * alpha + 255 * (1 - alpha)
+    return np.rint(rgb).astype(np.uint8)
+
+@traced(category='encode')
+def encode_pixels(rgb, encoding='flate', quality=90):
+    """Кодирует RGB массив в байты PNG или JPEG в зависимости от encoding"""
+    if encoding not in ENCODINGS:
+        raise ValueError(f'Неизвестный способ кодирования: {encoding}')
+
+    image = Image.fromarray(rgb, 'RGB')
+    buffer = io.BytesIO()
+    if encoding == 'jpeg':
+        image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    elif encoding == 'palette':
+        image = image.quantize(colors=256, method=Image.Quantize.MEDIANCUT,
+                               dither=Image.Dither.NONE)
+        image.save(buffer, format='PNG', optimize=True)
+    else:
+        image.save(buffer, format='PNG', compress_level=6)
+    return buffer.getvalue()
+
+def _png_chunks(data):
+    """Перебирает чанки PNG файла: (тип, содержимое)"""
+    position = 8
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        yield kind, data[position + 8:position + 8 + length]
+        position += 12 + length
+
+class EncodedImageXObject(pdfdoc.PDFImageXObject):
+    """
+    Изображение PDF из готовых байтов PNG или JPEG без перекодирования
+    Данные IDAT из PNG встраиваются как поток FlateDecode с предиктором 15,
+    JPEG - как поток DCTDecode
+    """
+
+    def __init__(self, name, data):
+        super().__init__(name)
+        self.decodeParms = None
+        self.palette = None
+
+        if data[:8] == b'\x89PNG\r\n\x1a\n':
+            self._load_png(data)
+        else:
+            image = Image.open(io.BytesIO(data))
+            self.width, self.height = image.size
+            self.bitsPerComponent = 8
+            self.colorSpace = 'DeviceGray' if image.mode == 'L' else 'DeviceRGB'
+            self._filters = ('DCTDecode',)
+            self.streamContent = data
+
+    def _load_png(self, data):
+        idat = []
+        for kind, chunk in _png_chunks(data):
+            if kind == b'IHDR':
+                width, height, bits, color_type, _, _, interlace = struct.unpack('>IIBBBBB', chunk)
+            elif kind == b'PLTE':
+                self.palette = chunk
+            elif kind == b'IDAT':
+                idat.append(chunk)
+
+        if interlace or color_type not in (0, 2, 3):
+            raise ValueError('Поддерживаются только PNG без чересстрочности и альфа-канала')
+
+        colors = {0: 1, 2: 3, 3: 1}[color_type]
+        self.width, self.height = width, height
+        self.bitsPerComponent = bits
+        self.colorSpace = {0: 'DeviceGray', 2: 'DeviceRGB', 3: 'Indexed'}[color_type]
+        self._filters = ('FlateDecode',)
+        self.decodeParms = pdfdoc.PDFDictionary({
+            'Predictor': 15,
+            'Colors': colors,
+            'BitsPerComponent': bits,
+            'Columns': width,
+        })
+        self.streamContent = b''.join(idat)
+
+    def format(self, document):
+        S = pdfdoc.PDFStream(content=self.streamContent)
+        d = S.dictionary
+        d['Type'] = pdfdoc.PDFName('XObject')
+        d['Subtype'] = pdfdoc.PDFName('Image')
+        d['Width'] = self.width
+        d['Height'] = self.height
+        d['BitsPerComponent'] = self.bitsPerComponent
+        if self.colorSpace == 'Indexed':
+            d['ColorSpace'] = pdfdoc.PDFArrayCompact([
+                pdfdoc.PDFName('Indexed'),
+                pdfdoc.PDFName('DeviceRGB'),
+                len(self.palette) // 3 - 1,
+                b'<' + self.palette.hex().encode('ascii') + b'>',
+            ])
+        else:
+            d['ColorSpace'] = pdfdoc.PDFName(self.colorSpace)
+        d['Filter'] = pdfdoc.PDFArray(map(pdfdoc.PDFName, self._filters))
+        if self.decodeParms is not None:
+            # При массиве фильтров параметры тоже задаются массивом
+            d['DecodeParms'] = pdfdoc.PDFArray([self.decodeParms])
+        return S.format(document)
+
+@traced('drawImage', category='pdf')
+def draw_encoded_image(canvas, data, x, y, width, height):
+    """
+    Размещает закодированное изображение (байты или путь к файлу) на холсте
+    Аналог canvas.drawImage, но без декодирования и повторного сжатия
+    """
+    if isinstance(data, str):
+        with open(data, 'rb') as file:
+            data = file.read()
+
+    name = hashlib.md5(data).hexdigest()
+    regName = canvas._doc.getXObjectName(name)
+    if canvas._doc.idToObject.get(regName) is None:
+        # Как и drawImage, одинаковое изображение хранится в документе один раз
+        image = EncodedImageXObject(name, data)
+        canvas._setXObjects(image)
+        canvas._doc.Reference(image, regName)
+        canvas._doc.addForm(name, image)
+
+    canvas._currentPageHasImages = 1
+    canvas.saveState()
+    canvas.translate(x, y)
+    canvas.scale(width, height)
+    canvas._code.append(f'/{regName} Do')
+    canvas.restoreState()
+    # Регистрируем изображение в ресурсах текущей страницы
+    canvas._formsinuse.append(name)
@@ -1,66 +1,115 @@
 from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.pagesizes import A4
-from PyPDF2 import PdfMerger, PdfReader
+import io
 import os
+import re
+import shutil
+from font_registry import register_fonts
+from tracing import traced
 
 class ReportGenerator:
-    def __init__(self):
+    def __init__(self, temp_dir='temp', in_memory=False):
         """Инициализация генератора отчетов"""
         self.setup_fonts()
-        self.temp_dir = 'temp'
-        self.ensure_temp_dir()
+        # Абсолютный путь, чтобы страницы сохранялись на место и при смене
+        # рабочей директории в изолированной области процесса
+        self.temp_dir = os.path.abspath(temp_dir)
+        # В режиме in_memory страницы пишутся в буферы, а не в temp_dir
+        self.in_memory = in_memory
+        self.buffers = []
+        if not in_memory:
+            self.ensure_temp_dir()
         self.current_page = 1
         
+    @traced(category='pdf')
     def setup_fonts(self):
-        """Настройка шрифтов"""
-        pdfmetrics.registerFont(TTFont('Roboto', 'RobotoMono[wght].ttf'))
+        """Настройка шрифтов: каждый шрифт загружается один раз на процесс"""
+        register_fonts()
         
     def ensure_temp_dir(self):
         """Создание временной директории"""
         if not os.path.exists(self.temp_dir):
-            os.makedirs(self.temp_dir)
+            os.makedirs(self.temp_dir, exist_ok=True)
             
-    def create_new_canvas(self):
-        """Создание нового PDF холста"""
-        filepath = os.path.join(self.temp_dir, f'page_{self.current_page}.pdf')
-        self.current_page += 1
-        c = canvas.Canvas(filepath, pagesize=A4)
+    def create_scratch_dir(self, page_number):
+        """Создание изолированной рабочей директории для страницы"""
+        scratch_dir = os.path.join(self.temp_dir, f'scratch_{page_number}')
+        os.makedirs(scratch_dir, exist_ok=True)
+        return scratch_dir
+            
+    @traced(category='pdf')
+    def create_new_canvas(self, page_number=None):
+        """
+        Создание нового PDF холста
+        Возвращает холст и путь к файлу страницы или, в режиме in_memory,
+        буфер, в который холст запишет страницу при save()
+        """
+        if page_number is None:
+            page_number = self.current_page
+        self.current_page = page_number + 1
+        
+        if self.in_memory:
+            target = io.BytesIO()
+            self.buffers.append(target)
+        else:
+            target = os.path.join(self.temp_dir, f'page_{page_number}.pdf')
+        
+        c = canvas.Canvas(target, pagesize=A4)
         c.setFont('Roboto', 12)
-        return c, filepath
+        return c, target
     
-    def merge_reports(self, output_filename='computer_graphics_report.pdf'):
-        """Объединение всех PDF файлов в один"""
-        merger = PdfMerger()
+    @traced(category='pdf')
+    def create_document_canvas(self, output='computer_graphics_report.pdf'):
+        """
+        Создание единого холста для всего документа
+        Проекты рисуют свои страницы подряд на одном холсте, итоговый PDF
+        пишется сразу в output (имя файла или поток) без этапа объединения
+        """
+        c = canvas.Canvas(output, pagesize=A4)
+        c.setFont('Roboto', 12)
+        return c
+    
+    @traced(category='pdf')
+    def merge_reports(self, output_filename='computer_graphics_report.pdf', sources=None):
+        """
+        Объединение всех PDF страниц в один документ
+        sources - пути к файлам, буферы или байты страниц в порядке следования
+        output_filename - имя файла или любой поток с методом write
+        """
+        # PyPDF2 нужен только при объединении, рабочие процессы его не загружают
+        from pdf_merge import merge_pdfs
         
         try:
-            # Собираем все PDF файлы из временной директории
-            pdf_files = sorted([f for f in os.listdir(self.temp_dir) if f.endswith('.pdf')])
-            
-            # Добавляем каждый файл в merger
-            for pdf in pdf_files:
-                filepath = os.path.join(self.temp_dir, pdf)
-                with open(filepath, 'rb') as file:
-                    merger.append(PdfReader(file))
+            if sources is None:
+                if self.in_memory:
+                    sources = self.buffers
+                else:
+                    # Собираем все PDF файлы из временной директории
+                    # в порядке номеров страниц (page_2 раньше page_10)
+                    pdf_files = sorted([f for f in os.listdir(self.temp_dir) if f.endswith('.pdf')],
+                                       key=lambda f: int(re.sub(r'\D', '', f) or 0))
+                    sources = [os.path.join(self.temp_dir, pdf) for pdf in pdf_files]
             
-            # Сохраняем объединенный файл
-            with open(output_filename, 'wb') as output:
-                merger.write(output)
+            # Страницы копируются в поток или файл по одной, весь документ
+            # в памяти не собирается; одинаковые ресурсы записываются один раз
+            merge_pdfs(sources, output_filename)
                 
         except Exception as e:
             print(f"Ошибка при объединении PDF: {str(e)}")
             raise
-        finally:
-            merger.close()
     
+    @traced(category='io')
     def cleanup(self):
         """Очистка временных файлов"""
         try:
             if os.path.exists(self.temp_dir):
                 for file in os.listdir(self.temp_dir):
+                    path = os.path.join(self.temp_dir, file)
                     try:
-                        os.remove(os.path.join(self.temp_dir, file))
+                        if os.path.isdir(path):
+                            shutil.rmtree(path)
+                        else:
+                            os.remove(path)
                     except Exception as e:
                         print(f"Ошибка при удалении файла {file}: {str(e)}")
                 os.rmdir(self.temp_dir)
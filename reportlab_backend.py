@@ -0,0 +1,142 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backend_bases import RendererBase
+from matplotlib.path import Path
+from reportlab.lib.utils import ImageReader
+from PIL import Image
+from tracing import traced
+
+# Соответствие стилей линий matplotlib и кодов reportlab
+_CAP_STYLES = {'butt': 0, 'round': 1, 'projecting': 2}
+_JOIN_STYLES = {'miter': 0, 'round': 1, 'bevel': 2}
+
+class RendererReportLab(RendererBase):
+    """
+    Рендерер matplotlib, который выводит контуры фигуры операциями рисования
+    reportlab прямо на холст страницы
+    Фигура рисуется при 72 dpi, поэтому один пиксель matplotlib равен одному
+    пункту PDF. Текст переводится в контуры базовым RendererBase.draw_text
+    """
+
+    def __init__(self, canvas, x, y, width, height):
+        super().__init__()
+        self.canvas = canvas
+        self.x0 = x
+        self.y0 = y
+        self.width = width
+        self.height = height
+
+    def flipy(self):
+        # Ось y направлена вверх, как и в PDF
+        return False
+
+    def get_canvas_width_height(self):
+        return self.width, self.height
+
+    def points_to_pixels(self, points):
+        return points
+
+    def option_image_nocomposite(self):
+        return True
+
+    def _make_path(self, path, transform, clip=None, simplify=None):
+        """Переводит путь matplotlib в путь reportlab в координатах страницы"""
+        rl_path = self.canvas.beginPath()
+        last = (0.0, 0.0)
+        for vertices, code in path.iter_segments(transform, remove_nans=True,
+                                                 clip=clip, simplify=simplify):
+            points = vertices.reshape(-1, 2) + (self.x0, self.y0)
+            if code == Path.MOVETO:
+                rl_path.moveTo(*points[0])
+            elif code == Path.LINETO:
+                rl_path.lineTo(*points[0])
+            elif code == Path.CURVE3:
+                # Квадратичную кривую Безье записываем как кубическую
+                control, end = points
+                c1 = last + 2 / 3 * (control - last)
+                c2 = end + 2 / 3 * (control - end)
+                rl_path.curveTo(*c1, *c2, *end)
+            elif code == Path.CURVE4:
+                rl_path.curveTo(*points[0], *points[1], *points[2])
+            elif code == Path.CLOSEPOLY:
+                rl_path.close()
+            if code != Path.CLOSEPOLY and len(points):
+                last = points[-1]
+        return rl_path
+
+    def _apply_clip(self, gc):
+        """Ограничивает рисование прямоугольником и контуром отсечения gc"""
+        rect = gc.get_clip_rectangle()
+        if rect is not None:
+            x, y, w, h = rect.bounds
+            clip = self.canvas.beginPath()
+            clip.rect(self.x0 + x, self.y0 + y, w, h)
+            self.canvas.clipPath(clip, stroke=0, fill=0)
+
+        clip_path, clip_transform = gc.get_clip_path()
+        if clip_path is not None:
+            clip = self._make_path(clip_path, clip_transform)
+            self.canvas.clipPath(clip, stroke=0, fill=0)
+
+    def draw_path(self, gc, path, transform, rgbFace=None):
+        c = self.canvas
+        c.saveState()
+        self._apply_clip(gc)
+
+        # Линии без заливки обрезаются по холсту и упрощаются, как в backend_pdf
+        clip = (0.0, 0.0, self.width, self.height) if rgbFace is None else None
+        simplify = path.should_simplify and rgbFace is None
+        rl_path = self._make_path(path, transform, clip=clip, simplify=simplify)
+
+        rgba = gc.get_rgb()
+        linewidth = gc.get_linewidth()
+        stroke = linewidth > 0 and rgba[3] > 0
+        if stroke:
+            c.setStrokeColorRGB(*rgba[:3])
+            c.setStrokeAlpha(gc.get_alpha() if gc.get_forced_alpha() else rgba[3])
+            c.setLineWidth(linewidth)
+            c.setLineCap(_CAP_STYLES.get(gc.get_capstyle(), 0))
+            c.setLineJoin(_JOIN_STYLES.get(gc.get_joinstyle(), 0))
+            offset, dashes = gc.get_dashes()
+            if dashes:
+                c.setDash(list(dashes), offset or 0)
+
+        fill = rgbFace is not None and (len(rgbFace) < 4 or rgbFace[3] > 0)
+        if fill:
+            c.setFillColorRGB(*rgbFace[:3])
+            if gc.get_forced_alpha():
+                c.setFillAlpha(gc.get_alpha())
+            else:
+                c.setFillAlpha(rgbFace[3] if len(rgbFace) > 3 else 1.0)
+
+        if stroke or fill:
+            c.drawPath(rl_path, stroke=int(stroke), fill=int(fill))
+        c.restoreState()
+
+    def draw_image(self, gc, x, y, im, transform=None):
+        height, width = im.shape[:2]
+        if width == 0 or height == 0:
+            return
+        c = self.canvas
+        c.saveState()
+        self._apply_clip(gc)
+        # Первая строка массива - верхняя строка изображения, как и в PDF
+        image = ImageReader(Image.fromarray(np.asarray(im)))
+        c.drawImage(image, self.x0 + x, self.y0 + y, width=width, height=height, mask='auto')
+        c.restoreState()
+
+@traced(category='matplotlib')
+def draw_figure(fig, canvas, x, y, width, height):
+    """
+    Рисует фигуру matplotlib векторно на холсте reportlab в прямоугольнике
+    (x, y, width, height), заданном в пунктах, и закрывает фигуру
+    """
+    try:
+        fig.set_dpi(72)
+        fig.set_size_inches(width / 72, height / 72)
+        renderer = RendererReportLab(canvas, x, y, width, height)
+        canvas.saveState()
+        fig.draw(renderer)
+        canvas.restoreState()
+    finally:
+        plt.close(fig)
@@ -0,0 +1,183 @@
+import numpy as np
+
+# Сколько точек поворачивается за один вызов matmul: при повороте на месте
+# NumPy копирует перекрывающийся вход, и копия не выходит за этот размер
+CHUNK_POINTS = 1 << 16
+
+def _float(values):
+    values = np.asarray(values)
+    return values if np.issubdtype(values.dtype, np.floating) else values.astype(np.float64)
+
+def unit_axes(axes):
+    """Оси вращения (..., 3), приведенные к единичной длине; у нулевой оси - NaN"""
+    axes = _float(axes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return axes / np.linalg.norm(axes, axis=-1, keepdims=True)
+
+def skew_matrices(axes):
+    """Кососимметрические матрицы An (..., 3, 3): An·r = n × r"""
+    axes = _float(axes)
+    n1, n2, n3 = axes[..., 0], axes[..., 1], axes[..., 2]
+    A = np.zeros(axes.shape + (3,), dtype=axes.dtype)
+    A[..., 0, 1], A[..., 0, 2] = -n3, n2
+    A[..., 1, 0], A[..., 1, 2] = n3, -n1
+    A[..., 2, 0], A[..., 2, 1] = -n2, n1
+    return A
+
+def rotation_matrices(axes, angles, dtype=np.float64):
+    """
+    Матрицы поворота Wn(θ) = I + (1-cos θ)An² + sin θ An для массивов осей (..., 3)
+    и углов (...), формы согласуются по правилам NumPy. Оси нормируются
+
+    Для единичной оси An² = nnᵀ - I, поэтому Wn(θ) = cos θ·I + (1-cos θ)nnᵀ + sin θ·An
+    и каждый элемент считается одной формулой, без произведений матриц
+    """
+    axes = unit_axes(axes).astype(dtype, copy=False)
+    angles = np.asarray(angles, dtype=dtype)
+    shape = np.broadcast_shapes(axes.shape[:-1], angles.shape)
+    x, y, z = (np.broadcast_to(axes[..., k], shape) for k in range(3))
+    c = np.cos(angles)
+    s = np.sin(angles)
+    C = 1 - c
+
+    W = np.empty(shape + (3, 3), dtype=dtype)
+    xy, xz, yz = C * x * y, C * x * z, C * y * z
+    W[..., 0, 0] = c + C * x * x
+    W[..., 0, 1] = xy - s * z
+    W[..., 0, 2] = xz + s * y
+    W[..., 1, 0] = xy + s * z
+    W[..., 1, 1] = c + C * y * y
+    W[..., 1, 2] = yz - s * x
+    W[..., 2, 0] = xz - s * y
+    W[..., 2, 1] = yz + s * x
+    W[..., 2, 2] = c + C * z * z
+    return W
+
+def rotation_quaternions(axes, angles, dtype=np.float64):
+    """Единичные кватернионы (w, x, y, z) поворотов вокруг осей (..., 3) на углы (...)"""
+    axes = unit_axes(axes).astype(dtype, copy=False)
+    half = np.asarray(angles, dtype=dtype) / 2
+    shape = np.broadcast_shapes(axes.shape[:-1], half.shape)
+    q = np.empty(shape + (4,), dtype=dtype)
+    q[..., 0] = np.cos(half)
+    q[..., 1:] = axes * np.sin(half)[..., np.newaxis]
+    return q
+
+def quaternions_to_matrices(q):
+    """Матрицы поворота (..., 3, 3) для кватернионов (..., 4); кватернионы нормируются"""
+    q = _float(q)
+    q = q / np.linalg.norm(q, axis=-1, keepdims=True)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    W = np.empty(q.shape[:-1] + (3, 3), dtype=q.dtype)
+    W[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    W[..., 0, 1] = 2 * (x * y - w * z)
+    W[..., 0, 2] = 2 * (x * z + w * y)
+    W[..., 1, 0] = 2 * (x * y + w * z)
+    W[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    W[..., 1, 2] = 2 * (y * z - w * x)
+    W[..., 2, 0] = 2 * (x * z - w * y)
+    W[..., 2, 1] = 2 * (y * z + w * x)
+    W[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return W
+
+def matrices_to_quaternions(W):
+    """
+    Кватернионы (..., 4) матриц поворота (..., 3, 3), с w ≥ 0
+    Элементы матрицы K = 4qqᵀ линейны по элементам W; кватернион берется
+    из строки K с наибольшим диагональным элементом, где деление устойчиво
+    """
+    W = _float(W)
+    w00, w01, w02 = W[..., 0, 0], W[..., 0, 1], W[..., 0, 2]
+    w10, w11, w12 = W[..., 1, 0], W[..., 1, 1], W[..., 1, 2]
+    w20, w21, w22 = W[..., 2, 0], W[..., 2, 1], W[..., 2, 2]
+    K = np.stack([
+        np.stack([1 + w00 + w11 + w22, w21 - w12, w02 - w20, w10 - w01], axis=-1),
+        np.stack([w21 - w12, 1 + w00 - w11 - w22, w01 + w10, w02 + w20], axis=-1),
+        np.stack([w02 - w20, w01 + w10, 1 - w00 + w11 - w22, w12 + w21], axis=-1),
+        np.stack([w10 - w01, w02 + w20, w12 + w21, 1 - w00 - w11 + w22], axis=-1),
+    ], axis=-2)
+    k = np.argmax(np.diagonal(K, axis1=-2, axis2=-1), axis=-1)
+    row = np.take_along_axis(K, k[..., np.newaxis, np.newaxis], axis=-2)[..., 0, :]
+    q = row / (2 * np.sqrt(np.take_along_axis(row, k[..., np.newaxis], axis=-1)))
+    return q * np.where(q[..., :1] < 0, -1, 1)
+
+def compose_quaternions(q1, q2):
+    """Произведение Гамильтона q1·q2: сначала поворот q2, затем q1"""
+    q1, q2 = _float(q1), _float(q2)
+    w1, x1, y1, z1 = (q1[..., k] for k in range(4))
+    w2, x2, y2, z2 = (q2[..., k] for k in range(4))
+    return np.stack([
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+    ], axis=-1)
+
+def compose_matrices(W1, W2):
+    """Композиция поворотов W1·W2: сначала W2, затем W1"""
+    return np.matmul(W1, W2)
+
+def quaternion_axis_angle(q):
+    """
+    Ось (..., 3) и угол (...) поворотов, заданных кватернионами (..., 4)
+    Угол лежит в [0, π]: поворот на θ > π - это поворот вокруг -n на 2π - θ.
+    У тождественного поворота ось любая, возвращается (0, 0, 1)
+    """
+    q = _float(q)
+    q = q * np.where(q[..., :1] < 0, -1, 1)
+    v = q[..., 1:]
+    sin_half = np.linalg.norm(v, axis=-1)
+    angles = 2 * np.arctan2(sin_half, q[..., 0])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        axes = np.where(sin_half[..., np.newaxis] > 0, v / sin_half[..., np.newaxis], [0, 0, 1])
+    return axes.astype(q.dtype, copy=False), angles
+
+def matrix_axis_angle(W):
+    """
+    Ось и угол матриц поворота (..., 3, 3): ось - собственный вектор
+    с собственным значением 1, Wn(θ)n = n
+    """
+    return quaternion_axis_angle(matrices_to_quaternions(W))
+
+def rotate_points(W, points, out=None):
+    """
+    Поворачивает точки (..., N, 3) матрицами W (..., 3, 3), формы ведущих осей
+    согласуются по правилам NumPy (одна матрица на облако, облако на каждый кадр
+    и т.п.). Результат пишется в out, в том числе в сам points; матрицы
+    приводятся к типу точек, так что float32 остается float32
+    """
+    points = _float(points)
+    Wt = np.swapaxes(np.asarray(W, dtype=points.dtype), -1, -2)
+    if points.ndim == 1:
+        return np.matmul(points, Wt, out=out)
+    shape = np.broadcast_shapes(points.shape[:-2], Wt.shape[:-2]) + points.shape[-2:]
+    if out is None:
+        out = np.empty(shape, dtype=points.dtype)
+    for start in range(0, points.shape[-2], CHUNK_POINTS):
+        part = slice(start, start + CHUNK_POINTS)
+        np.matmul(points[..., part, :], Wt, out=out[..., part, :])
+    return out
+
+def rotate_grid(W, X, Y, Z, out=None):
+    """
+    Поворачивает сетку, заданную массивами координат X, Y, Z одной формы
+    (как у поверхностей для plot_surface), одной матрицей W (3, 3)
+    Строки считаются частями по CHUNK_POINTS точек; out - тройка массивов
+    для результата, ею могут быть и сами X, Y, Z
+    """
+    X, Y, Z = np.broadcast_arrays(_float(X), _float(Y), _float(Z))
+    W = np.asarray(W, dtype=X.dtype)
+    if out is None:
+        out = tuple(np.empty(X.shape, dtype=X.dtype) for _ in range(3))
+    if X.ndim == 0:
+        rows, step = [()], 1
+    else:
+        row_size = max(X[0].size, 1)
+        step = max(CHUNK_POINTS // row_size, 1)
+        rows = [slice(start, start + step) for start in range(0, len(X), step)]
+    for part in rows:
+        x, y, z = X[part], Y[part], Z[part]
+        rotated = [W[i, 0] * x + W[i, 1] * y + W[i, 2] * z for i in range(3)]
+        for target, values in zip(out, rotated):
+            target[part] = values
+    return out
@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
+
+# Допустимое отклонение сетки от поверхности на странице, в пикселях
+TOLERANCE = 0.5
+# Место под график, если его не задали: ширина и высота в пунктах, dpi
+DEFAULT_VIEWPORT = (500, 400, 300)
+# Доля меньшей стороны места, которую занимает сцена трехмерных осей
+AXES_FRACTION = 0.75
+# Число точек пробной выборки профиля и предел точек по одному направлению
+PILOT_POINTS = 257
+MAX_POINTS = 2048
+
+_viewport = DEFAULT_VIEWPORT
+
+@contextmanager
+def viewport(width, height, dpi):
+    """
+    Задает место под строящийся график (размер в пунктах и разрешение),
+    по которому генераторы сеток выбирают их плотность
+    """
+    global _viewport
+    previous, _viewport = _viewport, (width, height, dpi)
+    try:
+        yield
+    finally:
+        _viewport = previous
+
+def pixels_per_unit(extent):
+    """Сколько пикселей на странице приходится на единицу данных сцены размахом extent"""
+    width, height, dpi = _viewport
+    return AXES_FRACTION * min(width, height) * dpi / 72 / max(extent, 1e-12)
+
+def grid_points(curvature, length, extent, tolerance=TOLERANCE):
+    """
+    Число точек по направлению сетки длиной length (в единицах параметра), при
+    котором хорды отклоняются от поверхности не больше чем на tolerance пикселей
+    curvature - наибольшая длина второй производной точки по параметру;
+    хорда шага h отклоняется на h^2 * curvature / 8. Плоскому направлению
+    (curvature = 0) хватает двух точек
+    """
+    curvature = curvature * pixels_per_unit(extent)
+    if curvature <= 0:
+        return 2
+    step = np.sqrt(8 * tolerance / curvature)
+    return int(np.clip(np.ceil(length / step) + 1, 2, MAX_POINTS))
+
+def sampled_curvature(points, spacing):
+    """Наибольшая длина второй производной кривой по точкам (d, n) с шагом параметра spacing"""
+    if points.shape[-1] < 3:
+        return 0.0
+    second = np.diff(points, 2, axis=-1) / spacing**2
+    return float(np.sqrt((second**2).sum(axis=0)).max())
+
+@lru_cache(maxsize=32)
+def angle_table(start, stop, n_points, dtype=np.float64):
+    """
+    Косинусы и синусы n_points равномерных углов от start до stop
+    Таблицы общие для всех поверхностей процесса, поэтому доступны только для чтения
+    """
+    phi = np.linspace(start, stop, n_points)
+    cos_phi = np.cos(phi).astype(dtype, copy=False)
+    sin_phi = np.sin(phi).astype(dtype, copy=False)
+    cos_phi.setflags(write=False)
+    sin_phi.setflags(write=False)
+    return cos_phi, sin_phi
+
+def _profile(f, u, dtype):
+    """Значения профиля на оси u; постоянный профиль (например, lambda u: R) растягивается"""
+    return np.broadcast_to(np.asarray(f(u), dtype=dtype), u.shape)
+
+def revolution_surface(p, q, u_range, phi_range=(0, 2*np.pi), n_points=None, n_phi=None,
+                       dtype=np.float64, tolerance=TOLERANCE):
+    """
+    Точки поверхности вращения кривой (p(u), 0, q(u)) вокруг оси OZ:
+    X = p(u)cos(φ), Y = p(u)sin(φ), Z = q(u)
+
+    Профиль вычисляется один раз на одномерной оси u, косинусы и синусы
+    берутся из таблицы angle_table, а сетка получается внешним произведением
+    Массивы имеют форму (n_phi, n_points), как у np.meshgrid(u, phi);
+    Z не зависит от φ и возвращается растянутым представлением без копии
+    dtype=np.float32 вдвое уменьшает объем памяти сетки
+
+    Если n_points не задано, плотность по u и по φ выбирается по месту под
+    график (viewport) так, чтобы сетка отличалась от поверхности не больше
+    чем на tolerance пикселей: прямая образующая получает две точки,
+    окружности - тем больше, чем больше их радиус на странице
+    """
+    if n_points is None:
+        pilot = np.linspace(u_range[0], u_range[1], PILOT_POINTS)
+        spacing = pilot[1] - pilot[0]
+        profile = np.stack([_profile(p, pilot, np.float64), _profile(q, pilot, np.float64)])
+        radius = np.abs(profile[0]).max()
+        extent = np.hypot(2 * np.sqrt(2) * radius, np.ptp(profile[1]))
+        n_points = grid_points(sampled_curvature(profile, spacing), u_range[1] - u_range[0], extent, tolerance)
+        if n_phi is None:
+            n_phi = grid_points(radius, abs(phi_range[1] - phi_range[0]), extent, tolerance)
+    if n_phi is None:
+        n_phi = n_points
+    u = np.linspace(u_range[0], u_range[1], n_points)
+    radius = _profile(p, u, dtype)
+    height = _profile(q, u, dtype)
+    cos_phi, sin_phi = angle_table(float(phi_range[0]), float(phi_range[1]), n_phi, np.dtype(dtype))
+
+    shape = (n_phi, n_points)
+    X = np.multiply(cos_phi[:, None], radius, out=np.empty(shape, dtype=dtype))
+    Y = np.multiply(sin_phi[:, None], radius, out=np.empty(shape, dtype=dtype))
+    Z = np.broadcast_to(height, shape)
+    return X, Y, Z
@@ -0,0 +1,313 @@
+from functools import lru_cache
+import numpy as np
+import matplotlib.artist as martist
+import matplotlib.cm as cm
+import matplotlib.colors as mcolors
+from tracing import traced
+
+# Сколько пар (треугольник, пиксель) обрабатывается за один проход
+# Ограничивает память растеризации при любом числе граней
+CHUNK_FRAGMENTS = 1 << 22
+
+# Нормаль, короче этой доли самой длинной нормали сетки, считается неопределенной
+DEGENERATE_NORMAL = 1e-9
+
+@lru_cache(maxsize=32)
+def grid_triangles(rows, cols):
+    """
+    Индексы вершин треугольников сетки rows x cols (вершины нумеруются
+    построчно): каждая ячейка делится на два треугольника
+    """
+    index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    a = index[:-1, :-1].ravel()
+    b = index[:-1, 1:].ravel()
+    c = index[1:, :-1].ravel()
+    d = index[1:, 1:].ravel()
+    triangles = np.concatenate([np.stack([a, b, d], axis=1), np.stack([a, d, c], axis=1)])
+    triangles.setflags(write=False)
+    return triangles
+
+def _nearest_defined(defined, axis):
+    """
+    Индексы ближайших вдоль оси axis вершин с определенной нормалью
+    и маска вершин, для которых такая вершина нашлась
+    """
+    n = defined.shape[axis]
+    index = np.arange(n).reshape([-1 if k == axis else 1 for k in range(defined.ndim)])
+    before = np.maximum.accumulate(np.where(defined, index, -1), axis=axis)
+    after = np.flip(np.minimum.accumulate(np.flip(np.where(defined, index, n), axis), axis=axis), axis)
+    nearest = np.where((before < 0) | ((after < n) & (after - index < index - before)), after, before)
+    found = (nearest >= 0) & (nearest < n)
+    return np.clip(nearest, 0, n - 1), found
+
+def grid_normals(X, Y, Z):
+    """
+    Единичные нормали в вершинах сетки: векторное произведение
+    разностных производных по обоим параметрам
+    """
+    du = [np.gradient(C, axis=1) for C in (X, Y, Z)]
+    dv = [np.gradient(C, axis=0) for C in (X, Y, Z)]
+    normals = np.stack([du[1] * dv[2] - du[2] * dv[1],
+                        du[2] * dv[0] - du[0] * dv[2],
+                        du[0] * dv[1] - du[1] * dv[0]], axis=-1)
+    length = np.linalg.norm(normals, axis=-1)
+    # В вырожденных точках (полюса, ось вращения) нормаль не определена: строка
+    # сетки стягивается в точку, и произведение - ошибка округления, а не ноль
+    defined = length > DEGENERATE_NORMAL * length.max(initial=0)
+    normals = np.divide(normals, length[..., np.newaxis], out=np.zeros_like(normals),
+                        where=defined[..., np.newaxis])
+
+    # Такие вершины берут нормаль у ближайшей невырожденной вершины соседней
+    # строки сетки, иначе полюс освещается одним фоновым светом и темнеет
+    for axis in range(normals.ndim - 1):
+        if defined.all():
+            break
+        nearest, found = _nearest_defined(defined, axis)
+        fill = found & ~defined
+        neighbours = np.take_along_axis(normals, nearest[..., np.newaxis], axis=axis)
+        normals = np.where(fill[..., np.newaxis], neighbours, normals)
+        defined = defined | fill
+    return normals.reshape(-1, 3)
+
+def phong_lighting(normals, view, light, ambient=0.35, diffuse=0.6, specular=0.25, shininess=20):
+    """
+    Освещение по Ламберту с бликом по Фонгу (Блинну-Фонгу) для всех вершин сразу
+    normals - единичные нормали, view и light - единичные направления
+    на наблюдателя и на источник света. Возвращает множитель базового цвета
+    и добавку блика для каждой вершины
+    Поверхности незамкнуты, поэтому освещаются с обеих сторон
+    """
+    normals = normals * np.where(normals @ view < 0, -1, 1)[:, None]
+    lambert = np.clip(normals @ light, 0, None)
+    halfway = (view + light) / np.linalg.norm(view + light)
+    highlight = np.clip(normals @ halfway, 0, None) ** shininess
+    return np.stack([ambient + diffuse * lambert, specular * highlight], axis=1).astype(np.float32)
+
+def _bucket(extent):
+    """Размер трафарета: ближайшая сверху степень двойки"""
+    return 1 << np.ceil(np.log2(np.maximum(extent, 1))).astype(np.int64)
+
+@traced(category='numpy')
+def rasterize(x, y, depth, values, triangles, width, height):
+    """
+    Заливает треугольники в изображение width x height с z-буфером
+    x, y - координаты вершин в пикселях (y растет вверх), depth - глубина
+    (меньше - ближе к наблюдателю), values - величины в вершинах (N, k),
+    которые линейно интерполируются внутри треугольников
+
+    Треугольники группируются по размеру ограничивающего прямоугольника,
+    и каждая группа перебирает пиксели одинаковым трафаретом целыми
+    массивами. Ближайший фрагмент в пикселе выбирается через np.minimum.at
+    по z-буферу, а величины вычисляются один раз для каждого покрытого
+    пикселя по номеру победившего треугольника
+    Возвращает изображение величин (height, width, k) с первой строкой
+    сверху и маску покрытия
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    depth = np.asarray(depth, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float32)
+    triangles = np.asarray(triangles)
+    x0, x1, x2 = (x[triangles[:, i]] for i in range(3))
+    y0, y1, y2 = (y[triangles[:, i]] for i in range(3))
+
+    # Пиксели, центры которых попадают в ограничивающий прямоугольник
+    left = np.maximum(np.ceil(np.minimum(np.minimum(x0, x1), x2) - 0.5), 0)
+    right = np.minimum(np.floor(np.maximum(np.maximum(x0, x1), x2) - 0.5), width - 1)
+    bottom = np.maximum(np.ceil(np.minimum(np.minimum(y0, y1), y2) - 0.5), 0)
+    top = np.minimum(np.floor(np.maximum(np.maximum(y0, y1), y2) - 0.5), height - 1)
+    area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+    keep = np.flatnonzero((right >= left) & (top >= bottom) & (np.abs(area) > 1e-12))
+    triangles = triangles[keep]
+    x0, x1, x2, y0, y1, y2 = x0[keep], x1[keep], x2[keep], y0[keep], y1[keep], y2[keep]
+    left, right, bottom, top, area = left[keep], right[keep], bottom[keep], top[keep], area[keep]
+
+    # Барицентрические координаты второй и третьей вершин и глубина - линейные
+    # функции точки: v = a*x + b*y + c. Для перебора пикселей они отсчитываются
+    # от центра левого нижнего пикселя прямоугольника, чтобы хватило float32
+    a1, b1 = (y2 - y0) / area, (x0 - x2) / area
+    a2, b2 = (y0 - y1) / area, (x1 - x0) / area
+    c1, c2 = -(a1 * x0 + b1 * y0), -(a2 * x0 + b2 * y0)
+    z = depth[triangles]
+    dz1, dz2 = z[:, 1] - z[:, 0], z[:, 2] - z[:, 0]
+    cx, cy = left + 0.5, bottom + 0.5
+    l1_corner = a1 * cx + b1 * cy + c1
+    l2_corner = a2 * cx + b2 * cy + c2
+    planes = np.stack([
+        a1, b1, l1_corner,
+        a2, b2, l2_corner,
+        a1 * dz1 + a2 * dz2, b1 * dz1 + b2 * dz2, z[:, 0] + l1_corner * dz1 + l2_corner * dz2,
+    ]).astype(np.float32)
+    start_pixel = ((height - 1 - bottom) * width + left).astype(np.int64)
+
+    zbuffer = np.full(width * height, np.inf, dtype=np.float32)
+    owner = np.full(width * height, -1, dtype=np.int32)
+    columns, rows = _bucket(right - left + 1), _bucket(top - bottom + 1)
+    groups = columns * (1 << 20) + rows
+    order = np.argsort(groups, kind='stable')
+    bounds = np.flatnonzero(np.diff(groups[order])) + 1
+    for group in np.split(order, bounds):
+        kw, kh = int(columns[group[0]]), int(rows[group[0]])
+        i = np.arange(kw, dtype=np.float32)
+        j = np.arange(kh, dtype=np.float32)[:, None]
+        step = max(CHUNK_FRAGMENTS // (kw * kh), 1)
+        for chunk in np.split(group, np.arange(step, len(group), step)):
+            a1c, b1c, l1c, a2c, b2c, l2c, dzx, dzy, zc = (p[chunk, None, None] for p in planes)
+            l1 = a1c * i + b1c * j + l1c
+            l2 = a2c * i + b2c * j + l2c
+            # Небольшой допуск закрывает щели на общих ребрах соседних треугольников
+            inside = (l1 >= -1e-5) & (l2 >= -1e-5) & (l1 + l2 <= 1 + 1e-5)
+            # Трафарет шире прямоугольника и у края изображения может выйти за него
+            if (left[chunk] + kw > width).any() or (bottom[chunk] + kh > height).any():
+                inside &= (i < width - left[chunk, None, None]) & (j < height - bottom[chunk, None, None])
+
+            # Номер треугольника и смещение пикселя в трафарете извлекаются
+            # из плоского индекса сдвигами: размеры трафарета - степени двойки
+            selected = np.flatnonzero(inside)
+            fragment_z = (dzx * i + dzy * j + zc).ravel().take(selected)
+            tri = chunk.take(selected >> (kw * kh).bit_length() - 1)
+            pixel = (start_pixel.take(tri) + (selected & (kw - 1))
+                     - width * ((selected >> kw.bit_length() - 1) & (kh - 1)))
+
+            # Фрагмент виден, если он ближайший среди всех уже обработанных в пикселе;
+            # более близкий фрагмент из следующих проходов его перезапишет
+            np.minimum.at(zbuffer, pixel, fragment_z)
+            front = fragment_z <= zbuffer[pixel]
+            owner[pixel[front]] = tri[front]
+
+    # Отложенное закрашивание: каждая величина - тоже линейная функция точки,
+    # она вычисляется только в покрытых пикселях по треугольнику-победителю
+    v = values[triangles]
+    dv1, dv2 = v[:, 1] - v[:, 0], v[:, 2] - v[:, 0]
+    a1, b1, l1c, a2, b2, l2c = (p[:, None] for p in planes[:6])
+    value_planes = np.concatenate([a1 * dv1 + a2 * dv2, b1 * dv1 + b2 * dv2,
+                                   v[:, 0] + l1c * dv1 + l2c * dv2], axis=1)
+    covered = np.flatnonzero(owner >= 0)
+    t = owner[covered]
+    gx, gy, gc = np.split(value_planes[t], 3, axis=1)
+    # Координаты пикселя отсчитываются от левого нижнего пикселя прямоугольника треугольника
+    px = (covered % width - left[t]).astype(np.float32)[:, None]
+    py = (height - 1 - covered // width - bottom[t]).astype(np.float32)[:, None]
+    image = np.zeros((width * height, values.shape[1]), dtype=np.float32)
+    image[covered] = gx * px + gy * py + gc
+    return image.reshape(height, width, -1), (owner >= 0).reshape(height, width)
+
+class Camera:
+    """
+    Камера трехмерных осей matplotlib: матрица проекции M осей (данные ->
+    нормированные координаты), перевод в пиксели фигуры и направление
+    на наблюдателя в координатах куба осей, где строится освещение
+    """
+
+    def __init__(self, ax):
+        self.M = ax.get_proj()
+        self.to_pixels = ax.transData.get_affine().get_matrix()
+        limits = np.array([ax.get_xlim3d(), ax.get_ylim3d(), ax.get_zlim3d()])
+        self.origin = limits[:, 0]
+        # Растяжение данных в куб осей: [min, max] -> [0, доля стороны куба]
+        self.scale = np.asarray(ax.get_box_aspect(), dtype=float) / (limits[:, 1] - limits[:, 0])
+
+        elev, azim = np.radians(ax.elev), np.radians(ax.azim)
+        self.view = np.array([np.cos(elev) * np.cos(azim), np.cos(elev) * np.sin(azim), np.sin(elev)])
+        right = np.cross([0, 0, 1], self.view)
+        right /= np.linalg.norm(right)
+        up = np.cross(self.view, right)
+        # Свет падает спереди, сверху и слева от наблюдателя
+        light = 2 * self.view + up - right
+        self.light = light / np.linalg.norm(light)
+
+    def project(self, X, Y, Z):
+        """Пиксельные координаты фигуры и глубина вершин (меньше - ближе)"""
+        points = np.stack([np.ravel(X), np.ravel(Y), np.ravel(Z), np.ones(np.size(X))])
+        vx, vy, vz, w = self.M @ points
+        vx, vy, vz = vx / w, vy / w, vz / w
+        a = self.to_pixels
+        return a[0, 0] * vx + a[0, 1] * vy + a[0, 2], a[1, 0] * vx + a[1, 1] * vy + a[1, 2], vz
+
+    def normals(self, X, Y, Z):
+        """Нормали сетки в координатах куба осей, согласованных с view и light"""
+        return grid_normals(*((np.asarray(C) - o) * s for C, o, s in zip((X, Y, Z), self.origin, self.scale)))
+
+class ShadedSurface(martist.Artist, cm.ScalarMappable):
+    """
+    Поверхность в трехмерных осях, которая при отрисовке проецируется
+    камерой осей, освещается и растеризуется с z-буфером в одно изображение
+    вместо тысяч отдельных многоугольников plot_surface
+    Цвет задается либо цветовой картой по Z (тогда работает colorbar), либо color
+    """
+
+    def __init__(self, X, Y, Z, cmap=None, color=None, alpha=1.0, zorder=1):
+        martist.Artist.__init__(self)
+        cm.ScalarMappable.__init__(self, cmap=cmap)
+        self.color = None if color is None else np.asarray(mcolors.to_rgb(color), dtype=float)
+        self.set_alpha(alpha)
+        self.set_zorder(zorder)
+        self.set_data(X, Y, Z)
+
+    def set_data(self, X, Y, Z):
+        """Заменяет сетку поверхности; шкала цветов перестраивается по новым Z"""
+        self.X, self.Y, self.Z = np.broadcast_arrays(X, Y, Z)
+        if self.color is None:
+            self.set_array(self.Z)
+            self.autoscale()
+        self.stale = True
+
+    def base_colors(self, scalars):
+        """Базовые RGB цвета пикселей до освещения по нормированным значениям Z"""
+        if self.color is None:
+            return self.get_cmap()(np.clip(scalars, 0, 1))[:, :3]
+        return self.color
+
+    def render(self, camera, width, height):
+        """
+        RGBA изображение поверхности в пикселях фигуры width x height,
+        обрезанное по проекции поверхности, и его левый нижний угол
+        """
+        x, y, depth = camera.project(self.X, self.Y, self.Z)
+        left = int(np.clip(np.floor(x.min()), 0, width))
+        bottom = int(np.clip(np.floor(y.min()), 0, height))
+        right = int(np.clip(np.ceil(x.max()), left, width))
+        top = int(np.clip(np.ceil(y.max()), bottom, height))
+        if right == left or top == bottom:
+            return None, left, bottom
+
+        # Интерполируются освещение и нормированное значение Z, а цветовая
+        # карта применяется уже в пикселях: цвета не зависят от плотности сетки
+        lighting = phong_lighting(camera.normals(self.X, self.Y, self.Z), camera.view, camera.light)
+        if self.color is None:
+            scalars = np.asarray(self.norm(self.Z.ravel()), dtype=np.float32)
+        else:
+            scalars = np.zeros(self.Z.size, dtype=np.float32)
+        values, covered = rasterize(x - left, y - bottom, depth, np.column_stack([lighting, scalars]),
+                                    grid_triangles(*self.Z.shape), right - left, top - bottom)
+        pixels = values[covered]
+        rgb = self.base_colors(pixels[:, 2]) * pixels[:, :1] + pixels[:, 1:2]
+
+        alpha = 1 if self.get_alpha() is None else self.get_alpha()
+        rgba = np.zeros(covered.shape + (4,), dtype=np.uint8)
+        rgba[covered, :3] = np.rint(np.clip(rgb, 0, 1) * 255)
+        rgba[covered, 3] = round(255 * alpha)
+        return rgba, left, bottom
+
+    @martist.allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        width, height = renderer.get_canvas_width_height()
+        image, left, bottom = self.render(Camera(self.axes), int(np.ceil(width)), int(np.ceil(height)))
+        if image is not None:
+            gc = renderer.new_gc()
+            # Рендереры matplotlib ждут первой нижнюю строку изображения
+            renderer.draw_image(gc, left, bottom, image[::-1])
+            gc.restore()
+        self.stale = False
+
+def plot_shaded_surface(ax, X, Y, Z, **kwargs):
+    """
+    Замена ax.plot_surface: добавляет ShadedSurface в оси и подстраивает
+    пределы осей под данные. kwargs - cmap, color, alpha, zorder
+    """
+    surface = ShadedSurface(X, Y, Z, **kwargs)
+    ax.add_artist(surface)
+    ax.auto_scale_xyz(surface.X, surface.Y, surface.Z, had_data=ax.has_data())
+    return surface
@@ -0,0 +1,141 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from main import load_page
+from report_generator import ReportGenerator
+from tracing import span
+
+# Проекты с параметрами: функция построения страницы и имена ее параметров
+# в порядке аргументов. У каждого модуля есть numeric_results с теми же параметрами
+SWEEPS = {
+    'project_1': ('create_report_simple', ('a', 'b')),
+    'project_2': ('create_report', ('a', 'b')),
+    'project_5': ('create_report', ('h', 'r')),
+    'project_6': ('create_report', ('R', 'r')),
+    'project_7': ('create_report', ('l', 'h', 'a', 'b', 'alpha')),
+}
+
+def read_table(path):
+    """
+    Читает таблицу вариантов в формате CSV: столбец project и столбцы
+    параметров этого проекта (лишние столбцы игнорируются)
+    Возвращает список вариантов (номер, проект, параметры) в порядке строк
+    """
+    variants = []
+    with open(path, newline='', encoding='utf-8') as file:
+        for index, row in enumerate(csv.DictReader(file)):
+            project = row['project'].strip()
+            if project not in SWEEPS:
+                raise ValueError(f'Строка {index + 1}: проект {project} не поддерживает перебор параметров')
+            _, names = SWEEPS[project]
+            try:
+                params = tuple(float(row[name]) for name in names)
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f'Строка {index + 1}: для {project} нужны параметры {", ".join(names)}')
+            variants.append((index, project, params))
+    return variants
+
+def compute_results(variants):
+    """
+    Вычисляет численные результаты всех вариантов: для каждого проекта
+    numeric_results вызывается один раз на массивах параметров всего перебора
+    Возвращает столбцы: номер варианта, проект, параметры и результаты;
+    значения, которые к проекту не относятся, равны NaN
+    """
+    columns = OrderedDict(variant=np.array([index for index, _, _ in variants], dtype=np.int64),
+                          project=np.array([project for _, project, _ in variants]))
+    row_of = {index: row for row, (index, _, _) in enumerate(variants)}
+
+    def column(name):
+        if name not in columns:
+            columns[name] = np.full(len(variants), np.nan)
+        return columns[name]
+
+    for project, (_, names) in SWEEPS.items():
+        group = [(index, params) for index, p, params in variants if p == project]
+        if not group:
+            continue
+        rows = np.array([row_of[index] for index, _ in group])
+        params = np.array([params for _, params in group], dtype=float).T
+
+        numeric_results = load_page(project, 'numeric_results')
+        with span(f'{project}.numeric_results', 'numpy', variants=len(group)):
+            results = numeric_results(*params)
+
+        for name, values in zip(names, params):
+            column(name)[rows] = values
+        for name, values in results.items():
+            column(f'{project}_{name}')[rows] = values
+    return columns
+
+def write_results(path, columns):
+    """Записывает столбцы в файл .npz (один массив NumPy на столбец)"""
+    np.savez(path, **columns)
+
+# Генератор отчетов рабочего процесса: шрифты регистрируются один раз на процесс
+_report_gen = None
+
+def _init_worker():
+    global _report_gen
+    _report_gen = ReportGenerator(in_memory=True)
+
+def render_variant(task):
+    """Строит PDF одного варианта в файл и возвращает (номер, путь, время в секундах)"""
+    index, project, params, output_dir = task
+    if _report_gen is None:
+        _init_worker()
+
+    start = time.perf_counter()
+    function_name, _ = SWEEPS[project]
+    create_report = load_page(project, function_name)
+    filepath = os.path.join(output_dir, f'variant_{index:05d}_{project}.pdf')
+    with span(f'variant {index}', 'page', module=project):
+        # Холст пишет страницу сразу в файл варианта, без буфера в памяти
+        canvas = _report_gen.create_document_canvas(filepath)
+        create_report(*params, canvas)
+        canvas.save()
+    return index, filepath, time.perf_counter() - start
+
+def run_sweep(variants, output_dir, jobs=1, chunksize=4):
+    """
+    Строит все варианты перебора и по мере готовности выдает
+    (номер, путь к PDF, время построения). Численные результаты
+    всего перебора записываются в output_dir/results.npz до построения страниц
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    write_results(os.path.join(output_dir, 'results.npz'), compute_results(variants))
+
+    # Варианты одного проекта идут подряд: символьные выкладки и ядра
+    # в рабочем процессе вычисляются один раз на весь его блок вариантов
+    tasks = sorted(((index, project, params, output_dir) for index, project, params in variants),
+                   key=lambda task: (task[1], task[0]))
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+            yield from executor.map(render_variant, tasks, chunksize=chunksize)
+    else:
+        for task in tasks:
+            yield render_variant(task)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Построение вариантов отчета по таблице параметров')
+    parser.add_argument('table', help='CSV со столбцом project и параметрами проекта')
+    parser.add_argument('--output-dir', default='variants', help='каталог для PDF и results.npz')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='число параллельных процессов (по умолчанию - число ядер)')
+    parser.add_argument('--chunksize', type=int, default=4,
+                        help='сколько вариантов рабочий процесс получает за раз')
+    args = parser.parse_args()
+
+    variants = read_table(args.table)
+    start = time.perf_counter()
+    for done, (index, filepath, seconds) in enumerate(run_sweep(variants, args.output_dir,
+                                                              args.jobs, args.chunksize), start=1):
+        print(f'[{done}/{len(variants)}] {filepath} ({seconds:.2f} с)', file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f'Вариантов: {len(variants)} за {elapsed:.1f} с '
+          f'({3600 * len(variants) / elapsed:.0f} в час)', file=sys.stderr)
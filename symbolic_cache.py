@@ -0,0 +1,77 @@
+import functools
+import hashlib
+import os
+import pickle
+import sympy
+from cache_files import PROJECT_DIR, atomic_write
+from fingerprint import fingerprint
+from tracing import span
+
+CACHE_DIR = os.path.join(PROJECT_DIR, '.symbolic_cache')
+
+# Результаты, уже полученные в текущем процессе
+_memory_cache = {}
+
+# Отпечатки функций: inspect.getsource и обход вызываемых функций - один раз на функцию
+_function_fingerprints = {}
+
+def function_fingerprint(func):
+    """Отпечаток исходного кода функции, вычисленный при первом обращении"""
+    try:
+        return _function_fingerprints[func]
+    except KeyError:
+        return _function_fingerprints.setdefault(func, fingerprint(func))
+
+def symbolic_key(func, args=(), kwargs=None):
+    """
+    Ключ кэша: хеш исходного кода функции (вместе с вызываемыми ею
+    функциями проекта), ее аргументов и версии sympy
+    """
+    h = hashlib.sha256()
+    for part in (f'{func.__module__}.{func.__qualname__}',
+                 function_fingerprint(func),
+                 fingerprint(tuple(args)),
+                 fingerprint(kwargs or {}),
+                 f'sympy={sympy.__version__}'):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+def load_result(filepath):
+    """Читает сохраненный результат; None, если записи нет или она повреждена"""
+    try:
+        with open(filepath, 'rb') as file:
+            return pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+def store_result(filepath, result):
+    """Атомарно записывает результат, чтобы параллельные процессы не видели недописанный файл"""
+    atomic_write(filepath, lambda file: pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL))
+
+def symbolic_cache(func):
+    """
+    Декоратор для символьных вычислений: результат хранится в памяти процесса
+    и на диске, поэтому повторный вызов и повторный запуск не пересчитывают
+    и не упрощают выражения заново
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__qualname__, 'sympy'):
+            key = symbolic_key(func, args, kwargs)
+            if key in _memory_cache:
+                return _memory_cache[key]
+
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            filepath = os.path.join(CACHE_DIR, key + '.pickle')
+            result = load_result(filepath)
+            if result is None:
+                result = func(*args, **kwargs)
+                store_result(filepath, result)
+
+            _memory_cache[key] = result
+            return result
+
+    return wrapper
@@ -0,0 +1,69 @@
+import hashlib
+import inspect
+import os
+import numpy as np
+import sympy
+from sympy import lambdify, srepr
+from symbolic_cache import CACHE_DIR, load_result, store_result
+from tracing import traced
+
+# Скомпилированные ядра текущего процесса
+_kernels = {}
+_namespace = None
+
+def _numpy_namespace():
+    """Пространство имен, в котором lambdify выполняет сгенерированный код NumPy"""
+    global _namespace
+    if _namespace is None:
+        _namespace = dict(lambdify((), 0, 'numpy').__globals__)
+    return _namespace
+
+def kernel_key(expr, args):
+    """Ключ ядра: структура выражения, порядок аргументов и версия sympy"""
+    h = hashlib.sha256()
+    for part in (srepr(expr), srepr(tuple(args)), f'sympy={sympy.__version__}'):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+def _generate_source(elements, args):
+    """Исходный код функции NumPy с исключением общих подвыражений"""
+    return inspect.getsource(lambdify(args, elements, 'numpy', cse=True))
+
+@traced(category='sympy')
+def compile_expression(expr, args):
+    """
+    Компилирует выражение или матрицу sympy в векторизованную функцию NumPy
+    Функция принимает массивы значений args (с обычной трансляцией форм)
+    и возвращает массив формы expr.shape + форма аргументов. Общие
+    подвыражения вычисляются один раз, а сгенерированный код хранится на
+    диске, поэтому повторные запуски не вызывают lambdify
+    """
+    args = tuple(args)
+    key = kernel_key(expr, args)
+    if key in _kernels:
+        return _kernels[key]
+
+    shape = tuple(expr.shape) if hasattr(expr, 'shape') else ()
+    elements = list(expr) if shape else [expr]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    filepath = os.path.join(CACHE_DIR, key + '.kernel')
+    source = load_result(filepath)
+    if source is None:
+        source = _generate_source(elements, args)
+        store_result(filepath, source)
+
+    namespace = dict(_numpy_namespace())
+    exec(source, namespace)
+    generated = namespace['_lambdifygenerated']
+
+    def kernel(*values):
+        values = [np.asarray(v, dtype=float) for v in values]
+        out_shape = np.broadcast_shapes(*(v.shape for v in values))
+        # Элементы, не зависящие от части аргументов, приводим к общей форме
+        results = [np.broadcast_to(np.asarray(r, dtype=float), out_shape) for r in generated(*values)]
+        return np.stack(results).reshape(shape + out_shape)
+
+    _kernels[key] = kernel
+    return kernel
@@ -0,0 +1,115 @@
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Каталог для событий трассировки; пока переменная не задана, трассировка
+# выключена и span ничего не записывает. Переменная окружения наследуется
+# рабочими процессами, поэтому они пишут события в тот же каталог
+TRACE_DIR_ENV = 'REPORT_TRACE_DIR'
+
+# События текущего процесса, еще не записанные на диск
+_events = []
+_lock = threading.Lock()
+
+def enabled():
+    """Включена ли трассировка в текущем процессе"""
+    return TRACE_DIR_ENV in os.environ
+
+def _now_us():
+    # Монотонные часы общие для всех процессов машины, поэтому события
+    # разных процессов ложатся на одну шкалу времени
+    return time.monotonic_ns() // 1000
+
+@contextmanager
+def span(name, category='report', **args):
+    """
+    Интервал трассировки: записывает время по часам, процессорное время потока,
+    идентификаторы процесса и потока. Интервалы могут быть вложенными
+    """
+    if not enabled():
+        yield
+        return
+
+    start = _now_us()
+    cpu_start = time.thread_time_ns() // 1000
+    try:
+        yield
+    finally:
+        cpu = time.thread_time_ns() // 1000 - cpu_start
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': start,
+            'dur': _now_us() - start,
+            'tts': cpu_start,
+            'tdur': cpu,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': dict(args, cpu_ms=cpu / 1000),
+        }
+        with _lock:
+            _events.append(event)
+
+def traced(name=None, category='report'):
+    """Декоратор: каждый вызов функции записывается интервалом трассировки"""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            with span(label, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def flush():
+    """Дописывает накопленные события процесса в его файл в каталоге трассировки"""
+    if not enabled():
+        return
+    with _lock:
+        events = _events[:]
+        _events.clear()
+    if not events:
+        return
+    path = os.path.join(os.environ[TRACE_DIR_ENV], f'{os.getpid()}.jsonl')
+    with open(path, 'a', encoding='utf-8') as file:
+        for event in events:
+            file.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+def start_trace(trace_dir):
+    """Включает трассировку в текущем процессе и в процессах, запущенных после этого"""
+    os.makedirs(trace_dir, exist_ok=True)
+    os.environ[TRACE_DIR_ENV] = os.path.abspath(trace_dir)
+
+def write_trace(output, main_pid=None):
+    """
+    Собирает события всех процессов в файл формата Chrome trace event
+    (открывается в Perfetto или chrome://tracing) и выключает трассировку
+    """
+    flush()
+    trace_dir = os.environ.pop(TRACE_DIR_ENV)
+    main_pid = main_pid or os.getpid()
+
+    events = []
+    for path in sorted(glob.glob(os.path.join(trace_dir, '*.jsonl'))):
+        with open(path, encoding='utf-8') as file:
+            events.extend(json.loads(line) for line in file)
+        os.remove(path)
+
+    # Подписи процессов для просмотрщика
+    for pid in sorted({event['pid'] for event in events}):
+        events.append({
+            'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+            'args': {'name': 'main' if pid == main_pid else f'worker {pid}'},
+        })
+
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file, ensure_ascii=False)
+    return len(events)
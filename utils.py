@@ -1,10 +1,48 @@
 import matplotlib.pyplot as plt
 from matplotlib import rc
+import hashlib
 import os
+import re
+import shutil
+import subprocess
+import tempfile
 from io import BytesIO
 import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.mathtext import MathTextParser
+from PIL import Image
+from cache_files import PROJECT_DIR, atomic_write
+from figure_cache import evict_cache, lookup_cached
+from tracing import traced
 matplotlib.use('Agg')
 
+FORMULA_CACHE_DIR = os.path.join(PROJECT_DIR, '.formula_cache')
+LATEX_PREAMBLE = r'\usepackage{amsmath}\usepackage{amssymb}'
+
+# Шаблон документа для пакетной компиляции: каждая формула на своей странице
+_LATEX_DOCUMENT = r'''\documentclass{article}
+\usepackage{type1cm}
+%s
+\pagestyle{empty}
+\begin{document}
+%s
+\end{document}
+'''
+
+# Знак %, перед которым нет обратной косой черты
+_UNESCAPED_PERCENT = re.compile(r'(?<!\\)%')
+
+# Оформление формул на графиках через mathtext: тот же вид, что у setup_latex,
+# но без TeX; применяется локально через plt.rc_context(MATHTEXT_RC)
+MATHTEXT_RC = {
+    'font.family': 'serif',
+    'mathtext.fontset': 'cm',
+    'font.size': 10,
+    'axes.labelsize': 10,
+    'axes.titlesize': 10,
+}
+
 def setup_latex():
     """Настраивает поддержку LaTeX в matplotlib"""
     rc('text', usetex=True)
@@ -24,38 +62,127 @@ def save_figure_to_temp(fig, filename, dpi=300):
     plt.close(fig)
     return filepath
 
+def formula_key(formula, fontsize=12, dpi=300, preamble=LATEX_PREAMBLE, engine='latex'):
+    """
+    Ключ кэша формулы: текст формулы, размер шрифта, разрешение, преамбула
+    и способ набора (для mathtext преамбула не влияет, но важна версия matplotlib)
+    """
+    h = hashlib.sha256()
+    parts = [formula, f'fontsize={fontsize}', f'dpi={dpi}', f'engine={engine}']
+    if engine == 'latex':
+        parts.append(preamble)
+    else:
+        parts.append(f'matplotlib={matplotlib.__version__}')
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+def _render_mathtext(formula, filepath, fontsize, dpi):
+    """
+    Набирает формулу встроенным mathtext без запуска TeX
+    Возвращает False, если mathtext не поддерживает формулу
+    """
+    text = f'${formula}$'
+    prop = FontProperties(family='serif', size=fontsize, math_fontfamily='cm')
+    try:
+        width, height, depth, _, _ = MathTextParser('path').parse(text, dpi=72, prop=prop)
+    except ValueError:
+        return False
+
+    # Фигура ровно по размеру формулы, без pyplot и глобальных настроек
+    fig = Figure(figsize=(width / 72, height / 72))
+    fig.text(0, depth / height, text, fontproperties=prop)
+    atomic_write(filepath, lambda file: fig.savefig(file, format='png', dpi=dpi, transparent=True))
+    return True
+
+def _render_latex_batch(items, fontsize, dpi, preamble, cache_dir):
+    """
+    Компилирует все формулы items [(формула, путь), ...] одним запуском latex
+    и переводит страницы DVI в PNG одним запуском dvipng
+    """
+    # Неэкранированный % в TeX - начало комментария: он съел бы конец строки
+    # вместе с $ и \newpage, поэтому в документе он экранируется
+    formulas = [_UNESCAPED_PERCENT.sub(r'\\%', formula) for formula, _ in items]
+    pages = '\n'.join(
+        rf'\fontsize{{{fontsize}}}{{{fontsize * 1.25:g}}}\selectfont ${formula}$\newpage'
+        for formula in formulas)
+
+    # Временный каталог внутри кэша: готовые файлы переносятся атомарно
+    with tempfile.TemporaryDirectory(dir=cache_dir) as work_dir:
+        with open(os.path.join(work_dir, 'formulas.tex'), 'w', encoding='utf-8') as file:
+            file.write(_LATEX_DOCUMENT % (preamble, pages))
+        subprocess.run(['latex', '-interaction=nonstopmode', '-halt-on-error', 'formulas.tex'],
+                       cwd=work_dir, check=True, capture_output=True)
+        subprocess.run(['dvipng', '-T', 'tight', '-D', str(dpi), '-bg', 'Transparent',
+                        '-o', 'formula_%d.png', 'formulas.dvi'],
+                       cwd=work_dir, check=True, capture_output=True)
+        for page, (_, filepath) in enumerate(items, start=1):
+            os.replace(os.path.join(work_dir, f'formula_{page}.png'), filepath)
+
+@traced(category='latex')
+def render_formulas(formulas, fontsize=12, dpi=300, preamble=LATEX_PREAMBLE, usetex=None,
+                    cache_dir=FORMULA_CACHE_DIR):
+    """
+    Рендерит список формул в PNG и возвращает пути к файлам в том же порядке
+    usetex=None - сначала mathtext, а LaTeX только для формул, которые mathtext
+    не разбирает; True - всегда LaTeX; False - только mathtext
+    Формулы, которых нет в кэше, компилируются одним запуском TeX на весь список
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = [None] * len(formulas)
+    pending = {}
+
+    for i, formula in enumerate(formulas):
+        if usetex is not True:
+            key = formula_key(formula, fontsize, dpi, engine='mathtext')
+            filepath = os.path.join(cache_dir, key + '.png')
+            # Отказ mathtext тоже запоминается: иначе каждый запуск заново
+            # разбирал бы формулу, прежде чем перейти к LaTeX
+            unsupported = os.path.join(cache_dir, key + '.unsupported')
+            if not os.path.exists(unsupported):
+                if lookup_cached(filepath) or _render_mathtext(formula, filepath, fontsize, dpi):
+                    paths[i] = filepath
+                    continue
+                atomic_write(unsupported, lambda file: None)
+            if usetex is False:
+                raise ValueError(f'mathtext не поддерживает формулу: {formula}')
+
+        filepath = os.path.join(cache_dir, formula_key(formula, fontsize, dpi, preamble) + '.png')
+        if not lookup_cached(filepath):
+            # Одинаковые формулы компилируются один раз
+            pending[filepath] = formula
+        paths[i] = filepath
+
+    if pending:
+        _render_latex_batch([(formula, path) for path, formula in pending.items()],
+                            fontsize, dpi, preamble, cache_dir)
+
+    evict_cache(cache_dir)
+    return paths
+
 def render_latex_to_file(formula, filename, fontsize=12, dpi=300):
-    """Рендерит LaTeX формулу в файл с улучшенным качеством"""
-    setup_latex()
-    
-    # Создаем фигуру с прозрачным фоном и меньшим размером
-    fig = plt.figure(figsize=(4, 0.3))
-    fig.patch.set_alpha(0.0)
-    
-    # Добавляем текст с выравниванием по центру
-    fig.text(0.5, 0.5, f'${formula}$', 
-             fontsize=fontsize, 
-             horizontalalignment='center',
-             verticalalignment='center',
-             usetex=True)
-    
-    # Сохраняем в файл с высоким разрешением
+    """Рендерит LaTeX формулу в файл temp/filename, не меняя глобальные настройки matplotlib"""
+    source, = render_formulas([formula], fontsize=fontsize, dpi=dpi, usetex=True)
+
     temp_dir = 'temp'
     if not os.path.exists(temp_dir):
         os.makedirs(temp_dir)
     filepath = os.path.join(temp_dir, filename)
-    
-    # Увеличиваем DPI для компенсации меньшего размера
-    fig.savefig(filepath, 
-                format='png',
-                dpi=dpi,
-                bbox_inches='tight',
-                pad_inches=0.02,
-                transparent=True,
-                facecolor='none')
-    plt.close(fig)
+    shutil.copyfile(source, filepath)
     return filepath
 
+def draw_formula(canvas, filepath, x, y, dpi=300):
+    """
+    Размещает отрендеренную формулу на холсте в натуральную величину
+    (x, y) - левый нижний угол; возвращает ширину и высоту в пунктах
+    """
+    with Image.open(filepath) as image:
+        pixels_w, pixels_h = image.size
+    width, height = pixels_w * 72 / dpi, pixels_h * 72 / dpi
+    canvas.drawImage(filepath, x, y, width=width, height=height, mask='auto')
+    return width, height
+
 def cleanup_temp_files():
     """Удаляет временные файлы"""
     temp_dir = 'temp'